@@ -1,16 +1,25 @@
-from qdrant_client import QdrantClient
-from qdrant_client.models import Filter
+import sys
+import os
 
-# Connect to your local Qdrant instance
-client = QdrantClient(url="http://localhost:6333")
+# Add the project root (parent of backend/) to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-collection_name = "knowledge_base"
-
-# Delete all points (empty filter = delete all)
-client.delete(
-    collection_name=collection_name,
-    points_selector=Filter(must=[])  # Correct way to specify "delete all"
+from backend.services.qdrant_service import (
+    QDRANT_COLLECTION,
+    ensure_collection_exists,
+    get_qdrant_client,
 )
 
-print(f"✅ All data deleted from collection '{collection_name}', but the collection itself is preserved.")
-        
\ No newline at end of file
+client = get_qdrant_client()
+
+# Dropping and recreating the collection is O(1) (a filesystem-level delete),
+# unlike deleting every point with an empty filter, which tombstones N points
+# and then compacts.
+client.delete_collection(QDRANT_COLLECTION)
+
+# Recreate through the same path the application uses, so the wiped
+# collection keeps its quantization config and payload indices instead of
+# coming back with bare vector params.
+ensure_collection_exists()
+
+print(f"✅ All data deleted from collection '{QDRANT_COLLECTION}', but the collection itself is preserved.")
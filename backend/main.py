@@ -1,20 +1,19 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from typing import List, Optional
 import uvicorn
+import asyncio
 import os
 import sys
-import logging
 from backend.services.hybrid_search import hybrid_search
-from backend.services.bm25_service import BM25Service
+from backend.services.bm25_service import get_bm25_service
+from backend.services.logging_config import get_logger
 
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
 
 # Add parent directory for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -24,16 +23,21 @@ from backend.services.query_engine import query_knowledge_base
 from backend.services.file_watcher import start_file_watcher
 from backend.services.llm_service import ensure_model_loaded
 from backend.services.qdrant_service import ensure_collection_exists
+from backend.services.embedding_service import get_embedding_model
 
-# Initialize BM25 index service once
-bm25_service = BM25Service(index_path=os.path.join("data", "bm25_index", "bm25_index.pkl"))
+# Initialize BM25 index service once (shared with the document processor)
+bm25_service = get_bm25_service()
 
 # Static directory setup
 STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
 if not os.path.exists(STATIC_DIR):
     os.makedirs(STATIC_DIR)
 
-app = FastAPI(title="Knowledge Base RAG System")
+# Documents directory shared by the listing, download, and view routes
+DOC_DIR = r"D:\knowledge base\Document for test"
+
+# orjson serializes responses several times faster than stdlib json
+app = FastAPI(title="Knowledge Base RAG System", default_response_class=ORJSONResponse)
 
 # CORS
 app.add_middleware(
@@ -65,6 +69,11 @@ async def startup_event():
         logger.info("Initializing Qdrant collection...")
         ensure_collection_exists()
 
+        logger.info("Warming up embedding model...")
+        # Load and run the encoder once now so the first /query does not
+        # pay the model load plus first-inference allocation cost.
+        get_embedding_model().encode("warmup", convert_to_numpy=True)
+
         logger.info("Checking GPT OSS 20B model...")
         ensure_model_loaded()
         logger.info("LLM model loaded successfully.")
@@ -93,7 +102,7 @@ def health():
     return {"llm_status": "ok" if ok else "error"}
 
 
-@app.post("/query", response_model=QueryResponse)
+@app.post("/query")
 async def query(request: QueryRequest):
     """
     Query knowledge base and return grounded, citation-aware answer.
@@ -102,33 +111,44 @@ async def query(request: QueryRequest):
         if not request.query.strip():
             raise HTTPException(status_code=400, detail="Query cannot be empty.")
 
-        answer, source_docs = query_knowledge_base(request.query, bm25_service)
+        # Retrieval and generation are blocking (embedding, BM25, LLM); run
+        # them on a worker thread so the event loop keeps serving requests.
+        answer, source_docs = await asyncio.to_thread(
+            query_knowledge_base, request.query, bm25_service
+        )
         if not answer or len(answer.strip()) < 5:
             answer = "No relevant information found. Please rephrase or try another query."
-        return QueryResponse(answer=answer, source_documents=source_docs)
+        # Serialize directly; the fields are built here, so response_model
+        # revalidation would only re-check what we just constructed
+        return ORJSONResponse({"answer": answer, "source_documents": source_docs})
 
     except Exception as e:
         logger.error(f"Query error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/documents", response_model=List[DocumentInfo])
-async def get_documents():
-    doc_dir = r"D:\knowledge base\Document for test"
-    try:
-        documents = []
-        for filename in os.listdir(doc_dir):
-            file_path = os.path.join(doc_dir, filename)
-            if os.path.isfile(file_path):
-                last_modified = os.path.getmtime(file_path)
+def _list_documents(doc_dir: str) -> List[DocumentInfo]:
+    # scandir's DirEntry carries the stat data from the directory read, so
+    # is_file and st_mtime need no extra syscall per entry
+    documents = []
+    with os.scandir(doc_dir) as entries:
+        for entry in entries:
+            if entry.is_file(follow_symlinks=False):
                 documents.append(
                     DocumentInfo(
-                        filename=filename,
-                        path=file_path,
-                        last_modified=str(last_modified)
+                        filename=entry.name,
+                        path=entry.path,
+                        last_modified=str(entry.stat().st_mtime)
                     )
                 )
-        return documents
+    return documents
+
+
+@app.get("/documents", response_model=List[DocumentInfo])
+async def get_documents():
+    try:
+        # Directory I/O off the event loop
+        return await asyncio.to_thread(_list_documents, DOC_DIR)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -136,10 +156,9 @@ async def get_documents():
 @app.get("/download/{filename}")
 async def download_document(filename: str):
     file_path = os.path.join(STATIC_DIR, filename)
-    doc_dir = r"D:\knowledge base\Document for test"
     try:
         if not os.path.exists(file_path):
-            alt_path = os.path.join(doc_dir, filename)
+            alt_path = os.path.join(DOC_DIR, filename)
             if os.path.exists(alt_path):
                 file_path = alt_path
             else:
@@ -153,10 +172,9 @@ async def download_document(filename: str):
 @app.get("/view/{filename}")
 async def view_document(filename: str):
     file_path = os.path.join(STATIC_DIR, filename)
-    doc_dir = r"D:\knowledge base\Document for test"
     try:
         if not os.path.exists(file_path):
-            alt_path = os.path.join(doc_dir, filename)
+            alt_path = os.path.join(DOC_DIR, filename)
             if os.path.exists(alt_path):
                 file_path = alt_path
             else:
@@ -168,4 +186,11 @@ async def view_document(filename: str):
 
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    # loop="auto" picks uvloop where it is available and http="httptools"
+    # replaces the pure-Python h11 parser. Workers default to 1 because the
+    # app embeds the file watcher and the BM25 index writer, which must run
+    # in exactly one process; raise WEB_CONCURRENCY once ingestion is split
+    # out.
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=False,
+                loop="auto", http="httptools",
+                workers=int(os.environ.get("WEB_CONCURRENCY", "1")))
\ No newline at end of file
@@ -1,92 +1,748 @@
-import pickle
+import array
+import mmap
 import os
+import pickle
 import re
+import struct
+import threading
 import logging
-from rank_bm25 import BM25Okapi
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+# Optional numba JIT for the scoring kernel
+try:
+    import numba
+except Exception:
+    numba = None
+
+# orjson decodes string-heavy dicts several times faster than pickle/json
+try:
+    import orjson
+except Exception:
+    orjson = None
+import json
+
+
+def _json_dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def _json_loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# BM25 Okapi parameters
+K1 = 1.5
+B = 0.75
+
+# Length-norm quantization: doc_len/avgdl is stored as a uint8 id (ratio * 32,
+# clipped), and the 256-entry table below maps ids back to the float norm
+# factor 1 - b + b * ratio. Postings then carry uint8 tf + uint8 norm id
+# instead of float32s: 4x smaller, 4x more postings per cache line.
+_NORM_SCALE = 32.0
+_NORM_CACHE = (1.0 - B + B * np.arange(256, dtype=np.float32) / _NORM_SCALE)
+
+# Rebuild the main index once the delta outgrows this fraction of it
+DELTA_COMPACT_RATIO = 0.1
+
+DEFAULT_INDEX_PATH = os.path.join("data", "bm25_index")
+
+# Precompiled once: pulling word runs with findall makes a single pass over
+# the string instead of the old sub-then-split double pass.
+_TOKEN_RE = re.compile(r'[^\W_]+')
+
+
 def simple_tokenize(text: str) -> List[str]:
     """A simple tokenizer that cleans and splits text."""
     if not text:
         return []
-    text = text.lower()
-    text = re.sub(r'[\W_]+', ' ', text)
-    return text.split()
+    return _TOKEN_RE.findall(text.lower())
+
+
+# Worker-pool startup costs more than it saves below this corpus size
+_PARALLEL_TOKENIZE_MIN_DOCS = 10_000
+
+
+def _tokenize_corpus(corpus: List[str]) -> List[List[str]]:
+    """Tokenizes a corpus, fanning out to worker processes for large ones.
+
+    Tokenization is independent per document and GIL-bound, so big rebuilds
+    get near-linear speedup from a process pool; small and incremental
+    builds stay serial to avoid pool startup overhead.
+    """
+    if len(corpus) >= _PARALLEL_TOKENIZE_MIN_DOCS and (os.cpu_count() or 1) > 1:
+        import multiprocessing
+        with multiprocessing.Pool() as pool:
+            return pool.map(simple_tokenize, corpus, chunksize=500)
+    return list(map(simple_tokenize, corpus))
+
+
+def _build_arrays(tokenized_corpus: List[List[str]]) -> Dict[str, Any]:
+    """Builds SoA posting arrays (CSR layout) from a tokenized corpus.
+
+    Tokens are interned to int32 term ids in a single flat array up front;
+    the per-(term, doc) frequency aggregation then happens vectorized on the
+    id array instead of via a Python counts dict per document.
+    """
+    n_docs = len(tokenized_corpus)
+    vocab: Dict[str, int] = {}
+
+    # One contiguous id array for the whole corpus, CSR offsets per document
+    flat_ids = array.array('i')
+    doc_offsets = np.zeros(n_docs + 1, dtype=np.int64)
+    for i, tokens in enumerate(tokenized_corpus):
+        for tok in tokens:
+            tid = vocab.get(tok)
+            if tid is None:
+                tid = len(vocab)
+                vocab[tok] = tid
+            flat_ids.append(tid)
+        doc_offsets[i + 1] = len(flat_ids)
+
+    n_terms = len(vocab)
+    doc_len = np.diff(doc_offsets).astype(np.float32)
+    avgdl = float(doc_len.mean()) if n_docs else 1.0
+
+    if n_terms:
+        # (term, doc) pairs collapse to counts in one sorted unique pass,
+        # already ordered by term then doc - exactly the CSR layout we store.
+        token_ids = np.frombuffer(flat_ids, dtype=np.intc).astype(np.int64)
+        doc_of_token = np.repeat(np.arange(n_docs, dtype=np.int64), np.diff(doc_offsets))
+        keys, counts = np.unique(token_ids * n_docs + doc_of_token, return_counts=True)
+        term_of_post = keys // n_docs
+        post_ids = (keys % n_docs).astype(np.int32)
+        post_tfs = np.clip(counts, 0, 255).astype(np.uint8)
+        lengths = np.bincount(term_of_post, minlength=n_terms)
+    else:
+        post_ids = np.empty(0, dtype=np.int32)
+        post_tfs = np.empty(0, dtype=np.uint8)
+        lengths = np.zeros(0, dtype=np.int64)
+    post_offsets = np.zeros(n_terms + 1, dtype=np.int64)
+    np.cumsum(lengths, out=post_offsets[1:])
+
+    # Quantized per-document length norm id (see _NORM_CACHE)
+    norm_id = np.clip(doc_len / avgdl * _NORM_SCALE, 0, 255).astype(np.uint8)
+
+    # Okapi idf: ln((N - df + 0.5) / (df + 0.5) + 1)
+    df = lengths.astype(np.float64)
+    idf = np.log((n_docs - df + 0.5) / (df + 0.5) + 1.0).astype(np.float32)
+
+    # Per-term score upper bound for MaxScore pruning: the best score any
+    # document could get from this term (max tf, smallest quantized norm).
+    if n_terms:
+        max_tf = np.maximum.reduceat(post_tfs, post_offsets[:-1]).astype(np.float32)
+        min_norm = float(_NORM_CACHE[norm_id.min()]) if norm_id.size else 1.0
+        term_ub = (idf * max_tf * (K1 + 1.0) / (max_tf + K1 * min_norm)).astype(np.float32)
+    else:
+        term_ub = np.empty(0, dtype=np.float32)
+
+    return {
+        "vocab": vocab,
+        "post_ids": post_ids,
+        "post_tfs": post_tfs,
+        "post_offsets": post_offsets,
+        "idf": idf,
+        "term_ub": term_ub,
+        "doc_len": doc_len,
+        "norm_id": norm_id,
+        "avgdl": avgdl,
+    }
+
+
+def _score_query_numpy(term_ids, idf, post_ids, post_tfs, post_offsets,
+                       norm_id, norm_cache, k1, scores):
+    """NumPy fallback scorer: one vectorized pass per query term."""
+    norm = k1 * norm_cache[norm_id]
+    for tid in term_ids:
+        start, end = post_offsets[tid], post_offsets[tid + 1]
+        ids = post_ids[start:end]
+        tfs = post_tfs[start:end].astype(np.float32)
+        scores[ids] += idf[tid] * tfs * (k1 + 1.0) / (tfs + norm[ids])
+
+
+if numba is not None:
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def _score_query_numba(term_ids, idf, post_ids, post_tfs, post_offsets,
+                           norm_id, norm_cache, k1, scores):
+        # Terms outer, postings inner: the inner loop is a streaming FMA over
+        # contiguous arrays, which LLVM auto-vectorizes (AVX2 where available).
+        # tf and length norm are uint8 in memory and widened in registers.
+        for t in range(term_ids.shape[0]):
+            tid = term_ids[t]
+            w = idf[tid]
+            start = post_offsets[tid]
+            end = post_offsets[tid + 1]
+            for j in numba.prange(start, end):
+                d = post_ids[j]
+                tf = np.float32(post_tfs[j])
+                norm = norm_cache[norm_id[d]]
+                scores[d] += w * tf * (k1 + 1.0) / (tf + k1 * norm)
+
+    _score_query = _score_query_numba
+else:
+    _score_query = _score_query_numpy
+
+
+class _DocStore:
+    """Lazy, file-backed document list.
+
+    Documents live as JSONL on disk with an int64 byte-offset table; a query
+    hit decodes just that line out of a read-only mmap, so loading the index
+    no longer rebuilds thousands of Python dicts up front. Documents appended
+    after construction are kept in an in-memory tail.
+    """
+
+    def __init__(self, jsonl_path: str, offsets: np.ndarray):
+        self._f = open(jsonl_path, "rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._offsets = offsets
+        self._n_file = len(offsets) - 1
+        self._tail: List[Dict[str, Any]] = []
+
+    def __len__(self) -> int:
+        return self._n_file + len(self._tail)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        i = int(i)
+        if i < 0:
+            i += len(self)
+        if 0 <= i < self._n_file:
+            start, end = self._offsets[i], self._offsets[i + 1]
+            return _json_loads(self._mm[start:end])
+        return self._tail[i - self._n_file]
+
+    def __iter__(self):
+        for i in range(self._n_file):
+            yield self[i]
+        yield from self._tail
+
+    def extend(self, docs: List[Dict[str, Any]]):
+        self._tail.extend(docs)
+
+    def close(self):
+        """Releases the map and file handle; the store is unusable after.
+
+        Windows refuses os.replace on a file with an open mapping, so the
+        store must be closed before the JSONL sidecar is swapped.
+        """
+        self._mm.close()
+        self._f.close()
+
 
 class BM25Service:
-    def __init__(self, index_path: str = "bm25_index.pkl"):
+    """BM25 index with a Structure-of-Arrays posting layout.
+
+    Postings are stored CSR-style: one contiguous int32 array of doc ids and
+    one float32 array of term frequencies, indexed per term through an offset
+    array. Scoring streams over these arrays instead of per-document Python
+    objects.
+
+    The main index is immutable; new documents go into a small delta index
+    (same layout) that is scored alongside it and folded in by compact()
+    once it grows past DELTA_COMPACT_RATIO of the main index.
+    """
+
+    def __init__(self, index_path: str = DEFAULT_INDEX_PATH):
         self.index_path = index_path
         self.docs: List[Dict[str, Any]] = []
-        self.doc_names: List[str] = []
-        self._bm25: BM25Okapi = None
+        # Bumped on every index mutation; callers caching results derived
+        # from this index key their entries on it for invalidation.
+        self.version = 0
+        # Serializes index mutation against scoring: the file watcher's
+        # pool and the reprocess utility call add_documents from several
+        # threads while query handlers read the same arrays. Reentrant
+        # because add_documents -> compact -> build_index nest.
+        self._lock = threading.RLock()
+        self._reset_index()
         self.load_index()
 
-    def build_index(self, docs: List[Dict[str, Any]]):
-        """Builds the BM25 index from a list of documents (chunks)."""
+    @property
+    def doc_names(self) -> List[str]:
+        return [meta.get("document_name", "unknown") for meta in self.docs]
+
+    def _reset_index(self):
+        self._mm = None
+        self.vocab: Dict[str, int] = {}
+        self._post_ids = np.empty(0, dtype=np.int32)
+        self._post_tfs = np.empty(0, dtype=np.uint8)
+        self._post_offsets = np.zeros(1, dtype=np.int64)
+        self._idf = np.empty(0, dtype=np.float32)
+        self._term_ub = np.empty(0, dtype=np.float32)
+        self._doc_len = np.empty(0, dtype=np.float32)
+        self._norm_id = np.empty(0, dtype=np.uint8)
+        self._avgdl = 1.0
+        self._delta: Optional[Dict[str, Any]] = None
+        self._delta_tokens: List[List[str]] = []
+        # Rows superseded by a re-ingest or delete; excluded from scoring
+        # and dropped for good at the next compaction.
+        self._dead_rows: set = set()
+        self._rows_by_path: Optional[Dict[str, List[int]]] = None
+
+    @property
+    def is_built(self) -> bool:
+        return len(self.vocab) > 0 or self._delta is not None
+
+    @property
+    def n_main(self) -> int:
+        """Number of documents covered by the immutable main index."""
+        return int(self._doc_len.shape[0])
+
+    def build_index(self, docs):
+        """Builds the BM25 index from an iterable of documents (chunks).
+
+        Accepts any iterable, so callers can stream documents in (e.g. page
+        by page out of Qdrant) without materializing an upstream list first.
+        """
+        docs = list(docs)
         if not docs:
             logger.warning("BM25: No documents provided to build index.")
             return
 
-        self.docs = docs
-        self.doc_names = [meta.get("document_name", "unknown") for meta in docs]
-
-        corpus = [d.get('text', '') for d in docs]
-        tokenized_corpus = [simple_tokenize(text) for text in corpus]
+        with self._lock:
+            old_docs, old_mm = self.docs, self._mm
+            self.docs = docs
+            self._dead_rows = set()
+            self._rows_by_path = None
 
-        self._bm25 = BM25Okapi(tokenized_corpus)
-        self.save_index()
+            corpus = [d.get('text', '') for d in docs]
+            tokenized_corpus = _tokenize_corpus(corpus)
+            self._build_postings(tokenized_corpus)
+            # The new arrays live on the heap now, so release any maps held
+            # over the previous on-disk index: Windows refuses os.replace on
+            # a mapped file, which made every save after a load fail there.
+            if isinstance(old_docs, _DocStore):
+                old_docs.close()
+            if old_mm is not None:
+                self._mm = None
+                try:
+                    old_mm.close()
+                except BufferError:
+                    # An array view of the old map escaped; leave the map to
+                    # the GC rather than fail the rebuild.
+                    logger.warning("BM25: previous index map still referenced.")
+            self.version += 1
+            self.save_index()
         logger.info(f"BM25 index built with {len(self.docs)} documents.")
 
+    def _build_postings(self, tokenized_corpus: List[List[str]]):
+        """(Re)builds the main index arrays and clears any delta."""
+        arrays = _build_arrays(tokenized_corpus)
+        self.vocab = arrays["vocab"]
+        self._post_ids = arrays["post_ids"]
+        self._post_tfs = arrays["post_tfs"]
+        self._post_offsets = arrays["post_offsets"]
+        self._idf = arrays["idf"]
+        self._term_ub = arrays["term_ub"]
+        self._doc_len = arrays["doc_len"]
+        self._norm_id = arrays["norm_id"]
+        self._avgdl = arrays["avgdl"]
+        self._delta = None
+        self._delta_tokens = []
+
+    def _path_index(self) -> Dict[str, List[int]]:
+        """Maps document_path to its live row indices, built lazily on the
+        first update/delete and kept incremental afterwards."""
+        if self._rows_by_path is None:
+            index: Dict[str, List[int]] = {}
+            for i, doc in enumerate(self.docs):
+                if i in self._dead_rows:
+                    continue
+                path = doc.get("document_path")
+                if path:
+                    index.setdefault(path, []).append(i)
+            self._rows_by_path = index
+        return self._rows_by_path
+
+    def _tombstone_path(self, document_path: str) -> int:
+        """Marks every row of a document as dead; returns how many."""
+        rows = self._path_index().pop(document_path, [])
+        self._dead_rows.update(rows)
+        return len(rows)
+
+    def remove_document(self, document_path: str) -> bool:
+        """Drops a document's chunks from scoring, mirroring a Qdrant delete."""
+        with self._lock:
+            if not self.is_built:
+                return True
+            removed = self._tombstone_path(document_path)
+            if removed:
+                self.version += 1
+                self._save_tombstones()
+        if removed:
+            logger.info("BM25: removed %d chunks for %s", removed, document_path)
+        return True
+
+    def add_documents(self, new_docs: List[Dict[str, Any]]):
+        """Incrementally indexes new documents without touching the main index.
+
+        New documents are appended to a small delta index; only they are
+        tokenized, so the cost is O(new docs) instead of O(corpus). Rows of
+        any document_path being re-ingested are tombstoned first, so an
+        updated file is not double-represented with stale text. Once the
+        delta (or the tombstone set) outgrows the main index by
+        DELTA_COMPACT_RATIO the whole index is rebuilt in one pass.
+        """
+        if not new_docs:
+            return
+        with self._lock:
+            if not self.is_built:
+                self.build_index(new_docs)
+                return
+
+            # Supersede prior entries for the incoming documents
+            for path in {d.get("document_path") for d in new_docs if d.get("document_path")}:
+                self._tombstone_path(path)
+
+            row = len(self.docs)
+            paths = self._path_index()
+            for doc in new_docs:
+                path = doc.get("document_path")
+                if path:
+                    paths.setdefault(path, []).append(row)
+                row += 1
+
+            self.docs.extend(new_docs)
+            self._delta_tokens.extend(
+                simple_tokenize(d.get('text', '')) for d in new_docs
+            )
+            self._delta = _build_arrays(self._delta_tokens)
+            self.version += 1
+
+            threshold = DELTA_COMPACT_RATIO * max(self.n_main, 1)
+            if len(self._delta_tokens) > threshold or len(self._dead_rows) > threshold:
+                self.compact()
+            else:
+                # Main arrays are untouched; just extend the docs sidecar
+                self._append_docs(new_docs)
+                self._save_tombstones()
+        logger.info(f"BM25: added {len(new_docs)} documents (delta size {len(self._delta_tokens)}).")
+
+    def compact(self):
+        """Folds the delta index into the main index with a full rebuild,
+        dropping tombstoned rows for good."""
+        logger.info("BM25: compacting delta index into main index.")
+        with self._lock:
+            if self._dead_rows:
+                dead = self._dead_rows
+                self.build_index(d for i, d in enumerate(self.docs) if i not in dead)
+            else:
+                self.build_index(self.docs)
+
+    def get_scores(self, tokenized_query: List[str]) -> np.ndarray:
+        """Scores every document against the query, returning a dense array."""
+        with self._lock:
+            scores = np.zeros(len(self.docs), dtype=np.float32)
+            term_ids = np.array(
+                sorted({self.vocab[t] for t in tokenized_query if t in self.vocab}),
+                dtype=np.int64
+            )
+            if term_ids.size:
+                _score_query(term_ids, self._idf, self._post_ids, self._post_tfs,
+                             self._post_offsets, self._norm_id, _NORM_CACHE,
+                             K1, scores)
+            self._add_delta_scores(tokenized_query, scores)
+            self._clear_dead_scores(scores)
+            return scores
+
+    def _clear_dead_scores(self, scores: np.ndarray):
+        """Zeroes the scores of tombstoned rows so they never rank."""
+        if self._dead_rows:
+            dead = np.fromiter(self._dead_rows, dtype=np.int64,
+                               count=len(self._dead_rows))
+            scores[dead] = 0.0
+
+    def _add_delta_scores(self, tokenized_query: List[str], scores: np.ndarray):
+        """Adds delta-index contributions into the (offset) tail of scores.
+
+        Terms are weighted with main-index statistics, not the delta's own:
+        idf and avgdl computed over a handful of fresh documents differ
+        wildly from the corpus-wide values, which systematically buried
+        newly ingested documents under the main index until compaction.
+        Terms the main vocab has never seen fall back to a combined-corpus
+        idf estimate (their main-index df is zero by construction).
+        """
+        if self._delta is None:
+            return
+        arr = self._delta
+        avgdl = self._avgdl if self.n_main else arr["avgdl"]
+        norm = K1 * (1.0 - B + B * arr["doc_len"] / avgdl)
+        n_total = self.n_main + len(self._delta_tokens)
+        offset = self.n_main
+        for tok in set(tokenized_query):
+            tid = arr["vocab"].get(tok)
+            if tid is None:
+                continue
+            start, end = arr["post_offsets"][tid], arr["post_offsets"][tid + 1]
+            ids = arr["post_ids"][start:end]
+            tfs = arr["post_tfs"][start:end].astype(np.float32)
+            main_tid = self.vocab.get(tok)
+            if main_tid is not None:
+                idf = float(self._idf[main_tid])
+            else:
+                df = float(end - start)
+                idf = float(np.log((n_total - df + 0.5) / (df + 0.5) + 1.0))
+            scores[offset + ids] += idf * tfs * (K1 + 1.0) / (tfs + norm[ids])
+
+    def _pruned_scores(self, term_ids: np.ndarray, top_k: int) -> np.ndarray:
+        """MaxScore-style scoring: processes terms in decreasing upper-bound
+        order and, once the remaining terms cannot lift a document past the
+        current k-th best score, only updates documents that can still qualify.
+        Pruned documents keep a partial (under-estimated) score, which is safe
+        because it is provably below the top-k threshold.
+        """
+        scores = np.zeros(len(self.docs), dtype=np.float32)
+        if not term_ids.size:
+            return scores
+
+        order = term_ids[np.argsort(-self._term_ub[term_ids])]
+        # tail_ub[i] = best possible contribution of terms i..end
+        tail_ub = np.cumsum(self._term_ub[order][::-1])[::-1]
+        norm = K1 * _NORM_CACHE[self._norm_id]
+        theta = 0.0
+
+        for i, tid in enumerate(order):
+            start, end = self._post_offsets[tid], self._post_offsets[tid + 1]
+            ids = self._post_ids[start:end]
+            tfs = self._post_tfs[start:end].astype(np.float32)
+            if theta > 0.0 and tail_ub[i] <= theta:
+                keep = scores[ids] + tail_ub[i] > theta
+                if not keep.any():
+                    continue
+                ids = ids[keep]
+                tfs = tfs[keep]
+            scores[ids] += self._idf[tid] * tfs * (K1 + 1.0) / (tfs + norm[ids])
+            if len(scores) > top_k:
+                theta = float(np.partition(scores, -top_k)[-top_k])
+
+        return scores
+
+    def tokenize(self, query_text: str) -> List[str]:
+        """Tokenizes a query with the same tokenizer used at index time."""
+        return simple_tokenize(query_text)
+
     def query(self, query_text: str, top_k: int = 5) -> List[Dict[str, Any]]:
         """Queries the index and returns the top k results with metadata."""
-        if self._bm25 is None:
-            logger.warning("BM25 index not built. Returning empty list.")
-            return []
+        return self.query_tokens(simple_tokenize(query_text), top_k=top_k)
+
+    def query_tokens(self, tokenized_query: List[str], top_k: int = 5) -> List[Dict[str, Any]]:
+        """Queries with a pre-tokenized query, so callers that already hold
+        the token list (shared cache keys, repeated sub-queries) skip
+        re-tokenization."""
+        with self._lock:
+            if not self.is_built:
+                logger.warning("BM25 index not built. Returning empty list.")
+                return []
 
-        tokenized_query = simple_tokenize(query_text)
-        doc_scores = self._bm25.get_scores(tokenized_query)
+            term_ids = np.array(
+                sorted({self.vocab[t] for t in tokenized_query if t in self.vocab}),
+                dtype=np.int64
+            )
+            if self._dead_rows:
+                # Dead rows would inflate the MaxScore threshold and wrongly
+                # prune live documents; score exactly until the next
+                # compaction drops them.
+                doc_scores = np.zeros(len(self.docs), dtype=np.float32)
+                if term_ids.size:
+                    _score_query(term_ids, self._idf, self._post_ids,
+                                 self._post_tfs, self._post_offsets,
+                                 self._norm_id, _NORM_CACHE, K1, doc_scores)
+            else:
+                doc_scores = self._pruned_scores(term_ids, top_k)
+            self._add_delta_scores(tokenized_query, doc_scores)
+            self._clear_dead_scores(doc_scores)
 
-        top_n_indices = sorted(range(len(doc_scores)), key=lambda i: doc_scores[i], reverse=True)[:top_k]
+            # O(N) partition for the top k, then sort only those k entries
+            if top_k >= len(doc_scores):
+                top_n_indices = np.argsort(-doc_scores)
+            else:
+                part = np.argpartition(-doc_scores, top_k)[:top_k]
+                top_n_indices = part[np.argsort(-doc_scores[part])]
 
-        results = []
-        for idx in top_n_indices:
-            original_doc = self.docs[idx]
-            results.append({
-                "document_name": original_doc.get("document_name"),
-                "chunk_index": original_doc.get("chunk_index"),
-                "text": original_doc.get("text"),
-                "bm25_score": doc_scores[idx]
-            })
+            results = []
+            for idx in top_n_indices:
+                if idx in self._dead_rows:
+                    continue
+                original_doc = self.docs[idx]
+                results.append({
+                    "document_name": original_doc.get("document_name"),
+                    "chunk_index": original_doc.get("chunk_index"),
+                    "text": original_doc.get("text"),
+                    "bm25_score": float(doc_scores[idx])
+                })
 
         return results
 
+    @property
+    def _pickle_path(self) -> str:
+        return os.path.join(self.index_path, "index.pkl")
+
+    @property
+    def _docs_path(self) -> str:
+        return os.path.join(self.index_path, "docs.jsonl")
+
+    @property
+    def _docs_idx_path(self) -> str:
+        return os.path.join(self.index_path, "docs.idx.npy")
+
+    @property
+    def _tombstones_path(self) -> str:
+        return os.path.join(self.index_path, "tombstones.json")
+
+    def _save_tombstones(self):
+        """Persists the dead-row set so reloads keep superseded rows hidden."""
+        try:
+            os.makedirs(self.index_path, exist_ok=True)
+            tmp_path = self._tombstones_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(_json_dumps(sorted(self._dead_rows)))
+            os.replace(tmp_path, self._tombstones_path)
+        except Exception as e:
+            logger.error(f"Failed to save BM25 tombstones: {e}", exc_info=True)
+
     def save_index(self):
-        """Saves the BM25 index and associated documents to a file."""
+        """Saves the BM25 index and associated documents to disk.
+
+        The numeric index state goes into a pickle using protocol 5 with
+        out-of-band buffers: the numpy posting arrays are written raw after
+        the pickle header (each with a length prefix) instead of being copied
+        through pickle's byte stream. Documents are kept out of the pickle
+        entirely, in a JSONL sidecar plus an int64 byte-offset table, so
+        loading does not rebuild one dict per chunk up front. All writes go
+        to temp files swapped in atomically so a memory-mapped reader of the
+        old index is never invalidated.
+        """
         try:
-            with open(self.index_path, "wb") as f:
-                pickle.dump({
-                    "bm25": self._bm25,
-                    "docs": self.docs
-                }, f)
+            os.makedirs(self.index_path, exist_ok=True)
+            payload = {
+                "vocab": self.vocab,
+                "post_ids": self._post_ids,
+                "post_tfs": self._post_tfs,
+                "post_offsets": self._post_offsets,
+                "idf": self._idf,
+                "term_ub": self._term_ub,
+                "doc_len": self._doc_len,
+                "norm_id": self._norm_id,
+                "avgdl": self._avgdl,
+            }
+            buffers = []
+            header = pickle.dumps(payload, protocol=5, buffer_callback=buffers.append)
+            tmp_path = self._pickle_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(struct.pack("<Q", len(header)))
+                f.write(header)
+                for buf in buffers:
+                    raw = buf.raw()
+                    f.write(struct.pack("<Q", raw.nbytes))
+                    f.write(raw)
+
+            lines = [_json_dumps(d) for d in self.docs]
+            offsets = np.zeros(len(lines) + 1, dtype=np.int64)
+            np.cumsum([len(line) + 1 for line in lines], out=offsets[1:])
+            with open(self._docs_path + ".tmp", "wb") as f:
+                for line in lines:
+                    f.write(line)
+                    f.write(b"\n")
+            np.save(self._docs_idx_path + ".tmp.npy", offsets)
+
+            os.replace(tmp_path, self._pickle_path)
+            os.replace(self._docs_path + ".tmp", self._docs_path)
+            os.replace(self._docs_idx_path + ".tmp.npy", self._docs_idx_path)
+            self._save_tombstones()
             logger.info(f"BM25 index saved to {self.index_path}")
         except Exception as e:
             logger.error(f"Failed to save BM25 index: {e}", exc_info=True)
 
+    def _append_docs(self, new_docs: List[Dict[str, Any]]):
+        """Appends documents to the JSONL sidecar without rewriting the index."""
+        try:
+            offsets = np.load(self._docs_idx_path)
+            lines = [_json_dumps(d) for d in new_docs]
+            new_offsets = np.zeros(len(offsets) + len(lines), dtype=np.int64)
+            new_offsets[:len(offsets)] = offsets
+            np.cumsum([len(line) + 1 for line in lines], out=new_offsets[len(offsets):])
+            new_offsets[len(offsets):] += offsets[-1]
+            with open(self._docs_path, "ab") as f:
+                for line in lines:
+                    f.write(line)
+                    f.write(b"\n")
+            np.save(self._docs_idx_path + ".tmp.npy", new_offsets)
+            os.replace(self._docs_idx_path + ".tmp.npy", self._docs_idx_path)
+        except Exception as e:
+            logger.error(f"Failed to append documents to BM25 sidecar: {e}", exc_info=True)
+
     def load_index(self):
-        """Loads the BM25 index from a file."""
-        if os.path.exists(self.index_path):
+        """Loads the BM25 index from disk."""
+        if os.path.exists(self._pickle_path):
             try:
-                with open(self.index_path, "rb") as f:
-                    data = pickle.load(f)
-                    self._bm25 = data["bm25"]
-                    self.docs = data["docs"]
-                    self.doc_names = [meta.get("document_name", "unknown") for meta in self.docs]
+                # mmap the file so unpickling reads straight from the page
+                # cache. The out-of-band buffers are handed to pickle as
+                # memoryviews into the map, so the posting arrays are backed
+                # by the page cache rather than copied onto the heap. The map
+                # is kept referenced for as long as those arrays live.
+                with open(self._pickle_path, "rb") as f:
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                view = memoryview(mm)
+                (header_len,) = struct.unpack_from("<Q", view, 0)
+                header = view[8:8 + header_len]
+
+                def _iter_buffers(pos=8 + header_len):
+                    while pos < len(view):
+                        (n,) = struct.unpack_from("<Q", view, pos)
+                        yield view[pos + 8:pos + 8 + n]
+                        pos += 8 + n
+
+                data = pickle.loads(header, buffers=_iter_buffers())
+                self.vocab = data["vocab"]
+                self._post_ids = data["post_ids"]
+                self._post_tfs = data["post_tfs"]
+                self._post_offsets = data["post_offsets"]
+                self._idf = data["idf"]
+                self._term_ub = data["term_ub"]
+                self._doc_len = data["doc_len"]
+                self._norm_id = data["norm_id"]
+                self._avgdl = data["avgdl"]
+                # The offset table is read eagerly (8 bytes per doc):
+                # _append_docs swaps the idx file in place, which Windows
+                # rejects while a mapping of it is open.
+                self.docs = _DocStore(self._docs_path,
+                                      np.load(self._docs_idx_path))
+                self._mm = mm
+                self._delta = None
+                self._delta_tokens = []
+                self._dead_rows = set()
+                self._rows_by_path = None
+                if os.path.exists(self._tombstones_path):
+                    with open(self._tombstones_path, "rb") as f:
+                        self._dead_rows = set(_json_loads(f.read()))
+                # Documents added after the last compaction live past the
+                # main index; re-tokenize just that tail into a fresh delta.
+                if len(self.docs) > self.n_main:
+                    self._delta_tokens = [
+                        simple_tokenize(d.get('text', '')) for d in self.docs[self.n_main:]
+                    ]
+                    self._delta = _build_arrays(self._delta_tokens)
+                self.version += 1
                 logger.info(f"BM25 index loaded from {self.index_path} with {len(self.docs)} documents.")
             except Exception as e:
                 logger.error(f"Failed to load BM25 index: {e}", exc_info=True)
-                self._bm25 = None
+                self._reset_index()
                 self.docs = []
+
+
+# Shared service instance, mirroring qdrant_service.get_qdrant_client()
+_bm25_service: Optional[BM25Service] = None
+
+
+def get_bm25_service() -> BM25Service:
+    global _bm25_service
+    if _bm25_service is None:
+        _bm25_service = BM25Service(index_path=DEFAULT_INDEX_PATH)
+    return _bm25_service
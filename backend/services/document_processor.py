@@ -1,28 +1,38 @@
 import os
-import re
 import fitz  # PyMuPDF
-import pdfplumber
 import docx
 import pandas as pd
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Dict, Any, Tuple
 import uuid
-import logging
 
 from backend.services.qdrant_service import store_document_embeddings, delete_document
-from backend.services.utils import adaptive_sentence_chunks
+from backend.services.bm25_service import get_bm25_service
+from backend.services.pdf_page_extractor import extract_pdf_page
+from backend.services.utils import adaptive_sentence_chunks, preprocess_text
+from backend.services.logging_config import get_logger
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
 
 
-def process_document(file_path: str, update: bool = False) -> bool:
+# Number of chunks accumulated before each Qdrant/BM25 flush; memory stays
+# O(batch) instead of O(document).
+CHUNK_BATCH_SIZE = 256
+
+# Bound on batches buffered between extraction and embedding/upload
+UPLOAD_QUEUE_SIZE = 8
+
+
+def process_document(file_path: str, update: bool = False,
+                     batch_size: int = CHUNK_BATCH_SIZE) -> bool:
     """
     Process a document file, extracting both text and structured table data.
     - Extracts text from PDF, DOCX, TXT.
     - Extracts tables from PDF, DOCX, XLSX.
     - Chunks text and table rows separately.
-    - Stores chunks with rich metadata in Qdrant.
+    - Streams chunks with rich metadata into Qdrant in fixed-size batches.
     """
     try:
         filename = os.path.basename(file_path)
@@ -34,43 +44,67 @@ def process_document(file_path: str, update: bool = False) -> bool:
             delete_document(file_path)
 
         document_name = os.path.basename(file_path)
-        all_chunks: List[str] = []
-        metadatas: List[Dict[str, Any]] = []
-
-        # Extract text and tables based on file type
-        text_chunks, table_chunks = extract_text_and_tables(file_path)
-
-        # Process text chunks
-        for i, chunk_text in enumerate(text_chunks):
-            all_chunks.append(chunk_text)
-            metadatas.append({
-                "is_table": False,
-                "page_number": chunk_text.get("page_number") if isinstance(chunk_text, dict) else None,
-                "document_path": file_path,
-                "document_name": document_name,
-                "chunk_index": i
-            })
+        bm25_service = get_bm25_service()
+        total_chunks = 0
+        total_tables = 0
 
-        # Process table chunks
-        for table_meta in table_chunks:
-            all_chunks.append(table_meta["text"])
-            # Remove the 'text' key from the metadata to avoid duplication
-            meta = {k: v for k, v in table_meta.items() if k != 'text'}
-            meta.update({
-                "is_table": True,
-                "document_path": file_path,
-                "document_name": document_name
-            })
-            metadatas.append(meta)
+        # Producer/consumer split: extraction keeps producing batches while
+        # the consumer thread embeds and upserts the previous one, so wall
+        # time approaches max(extract, embed) instead of their sum. The
+        # bounded queue keeps memory at O(queue * batch).
+        batch_queue: "queue.Queue" = queue.Queue(maxsize=UPLOAD_QUEUE_SIZE)
+        upload_errors: List[Exception] = []
+
+        def _upload_batches():
+            while True:
+                item = batch_queue.get()
+                if item is None:
+                    break
+                chunks, metadatas = item
+                try:
+                    # store_document_embeddings catches internally and
+                    # reports failure through its return value, so the
+                    # flag is the only error signal to propagate.
+                    if not store_document_embeddings(file_path, document_name,
+                                                     chunks, metadatas=metadatas):
+                        upload_errors.append(RuntimeError(
+                            f"Failed to store embeddings batch for {file_path}"
+                        ))
+                except Exception as e:
+                    logger.error(f"Error uploading batch for {file_path}: {e}", exc_info=True)
+                    upload_errors.append(e)
+                finally:
+                    batch_queue.task_done()
 
-        if not all_chunks:
+        consumer = threading.Thread(target=_upload_batches, daemon=True)
+        consumer.start()
+        bm25_docs: List[Dict[str, Any]] = []
+        try:
+            for chunks, metadatas in iter_chunk_batches(file_path, document_name,
+                                                        batch_size=batch_size):
+                batch_queue.put((chunks, metadatas))
+                bm25_docs.extend(
+                    {**meta, "text": chunk} for chunk, meta in zip(chunks, metadatas)
+                )
+                total_chunks += len(chunks)
+                total_tables += sum(1 for meta in metadatas if meta.get("is_table"))
+        finally:
+            batch_queue.put(None)
+            consumer.join()
+
+        if upload_errors:
+            raise upload_errors[0]
+
+        if not total_chunks:
             logger.warning(f"No chunks generated for {file_path}")
             return False
 
-        # Store in Qdrant
-        store_document_embeddings(file_path, document_name, all_chunks, metadatas=metadatas)
+        # Keep BM25 in sync incrementally instead of requiring a full
+        # rebuild. One add per document: add_documents tombstones prior
+        # entries for the path, so this must cover the whole new version.
+        bm25_service.add_documents(bm25_docs)
 
-        logger.info("Parsed %s: %d chunks (%d tables)", document_name, len(all_chunks), len(table_chunks))
+        logger.info("Parsed %s: %d chunks (%d tables)", document_name, total_chunks, total_tables)
         return True
 
     except Exception as e:
@@ -78,57 +112,134 @@ def process_document(file_path: str, update: bool = False) -> bool:
         return False
 
 
-def extract_text_and_tables(file_path: str) -> Tuple[List[str], List[Dict[str, Any]]]:
-    """Extracts text and tables from a file, returns separate lists."""
+def remove_document(file_path: str) -> bool:
+    """Removes a deleted document's chunks from Qdrant and the BM25 index."""
+    try:
+        delete_document(file_path)
+        get_bm25_service().remove_document(file_path)
+        logger.info(f"Removed document from indexes: {file_path}")
+        return True
+    except Exception as e:
+        logger.error(f"Error removing document {file_path}: {e}", exc_info=True)
+        return False
+
+
+def iter_chunk_batches(file_path: str, document_name: str,
+                       batch_size: int = CHUNK_BATCH_SIZE):
+    """Yields (chunks, metadatas) batches, consuming extraction page by page.
+
+    A shared metadata template is copied per chunk rather than rebuilding
+    each dict literal, and chunk indices run document-wide across batches.
+    """
+    base_meta = {
+        "is_table": False,
+        "page_number": None,
+        "document_path": file_path,
+        "document_name": document_name,
+        "chunk_index": 0
+    }
+    chunk_index = 0
+    chunks: List[str] = []
+    metadatas: List[Dict[str, Any]] = []
+
+    for page_number, text_chunks, table_chunks in iter_page_chunks(file_path):
+        for chunk_text in text_chunks:
+            meta = base_meta.copy()
+            meta["page_number"] = page_number
+            meta["chunk_index"] = chunk_index
+            chunks.append(chunk_text)
+            metadatas.append(meta)
+            chunk_index += 1
+            if len(chunks) >= batch_size:
+                yield chunks, metadatas
+                chunks, metadatas = [], []
+
+        for table_meta in table_chunks:
+            # Remove the 'text' key from the metadata to avoid duplication
+            meta = {k: v for k, v in table_meta.items() if k != 'text'}
+            meta.update(base_meta)
+            meta["is_table"] = True
+            meta["page_number"] = page_number
+            meta["chunk_index"] = chunk_index
+            chunks.append(table_meta["text"])
+            metadatas.append(meta)
+            chunk_index += 1
+            if len(chunks) >= batch_size:
+                yield chunks, metadatas
+                chunks, metadatas = [], []
+
+    if chunks:
+        yield chunks, metadatas
+
+
+def iter_page_chunks(file_path: str):
+    """Yields (page_number, text_chunks, table_chunks) one unit at a time."""
     ext = os.path.splitext(file_path)[1].lower()
-    text_chunks, table_chunks = [], []
-    
+
     if ext == '.pdf':
-        text_chunks, table_chunks = extract_from_pdf(file_path)
+        yield from iter_pdf_pages(file_path)
     elif ext == '.docx':
         text_chunks, table_chunks = extract_from_docx(file_path)
+        yield None, text_chunks, table_chunks
     elif ext == '.xlsx':
-        table_chunks = extract_from_excel(file_path)
+        yield None, [], extract_from_excel(file_path)
     elif ext in ['.txt', '.md']:
         with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
             text = f.read()
-            text_chunks = adaptive_sentence_chunks(text, min_words=8)
-            
-    return text_chunks, table_chunks
+        yield None, adaptive_sentence_chunks(text, min_words=8), []
 
 
-def extract_from_pdf(file_path: str) -> Tuple[List[str], List[Dict[str, Any]]]:
-    """Extracts page text and tables from a PDF."""
+def extract_text_and_tables(file_path: str) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """Extracts text and tables from a file, returns separate lists."""
     text_chunks, table_chunks = [], []
-    with pdfplumber.open(file_path) as pdf:
-        for i, page in enumerate(pdf.pages):
-            # Extract text from the page
-            page_text = page.extract_text() or ""
-            if page_text:
-                clean_text = preprocess_text(page_text)
-                chunks = adaptive_sentence_chunks(clean_text, min_words=8)
-                for chunk in chunks:
-                    text_chunks.append(chunk)
-
-            # Extract tables from the page
-            tables = page.extract_tables()
-            for table_idx, table in enumerate(tables):
-                if not table: continue
-                headers = [str(h).strip() for h in table[0]] if table[0] else []
-                for row_idx, row in enumerate(table[1:], start=1):
-                    row_data = {headers[j]: str(cell).strip() for j, cell in enumerate(row) if j < len(headers)}
-                    row_text = ", ".join([f"{k}: {v}" for k, v in row_data.items()])
-                    table_chunks.append({
-                        "text": row_text,
-                        "is_table": True,
-                        "page": i + 1,
-                        "table_index": table_idx,
-                        "row_index": row_idx,
-                        "headers": headers
-                    })
+    for _, page_text_chunks, page_table_chunks in iter_page_chunks(file_path):
+        text_chunks.extend(page_text_chunks)
+        table_chunks.extend(page_table_chunks)
     return text_chunks, table_chunks
 
 
+# One page-extraction pool for the whole process, created on the first
+# multi-page PDF and never shut down. A fresh pool per document made every
+# worker re-import the worker module per PDF, and with several PDFs in
+# flight under the watcher pool the per-document sizing oversubscribed the
+# CPU roughly eightfold.
+_pdf_pool: "ProcessPoolExecutor" = None
+_pdf_pool_lock = threading.Lock()
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+    if _pdf_pool is None:
+        with _pdf_pool_lock:
+            if _pdf_pool is None:
+                _pdf_pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+    return _pdf_pool
+
+
+def iter_pdf_pages(file_path: str):
+    """Yields (page_number, text_chunks, table_chunks) per PDF page, farming
+    pages out to worker processes. pdfplumber's layout analysis is CPU-bound
+    pure Python, so processes (not threads) give near-linear speedup on
+    multi-page files. Results stream back in page order while later pages are
+    still being extracted."""
+    with fitz.open(file_path) as doc:
+        n_pages = doc.page_count
+
+    if n_pages == 0:
+        return
+
+    if n_pages == 1:
+        text_chunks, table_chunks = extract_pdf_page((file_path, 0))
+        yield 1, text_chunks, table_chunks
+        return
+
+    # executor.map preserves page order and yields lazily; concurrent
+    # documents share the pool's workers instead of spawning their own.
+    for i, (text_chunks, table_chunks) in enumerate(_get_pdf_pool().map(
+            extract_pdf_page, [(file_path, j) for j in range(n_pages)])):
+        yield i + 1, text_chunks, table_chunks
+
+
 def extract_from_docx(file_path: str) -> Tuple[List[str], List[Dict[str, Any]]]:
     """Extracts paragraphs and tables from a DOCX."""
     doc = docx.Document(file_path)
@@ -163,23 +274,27 @@ def extract_from_excel(file_path: str) -> List[Dict[str, Any]]:
         df = pd.read_excel(xls, sheet_name=sheet_name)
         df = df.dropna(how='all')
         if df.empty: continue
-        
+
         headers = [str(h).strip() for h in df.columns]
-        for row_idx, row in df.iterrows():
-            row_data = {h: str(row[h]).strip() for h in headers if h in row and pd.notna(row[h])}
-            row_text = ", ".join([f"{k}: {v}" for k,v in row_data.items()])
-            table_chunks.append({
+
+        # Build the "col: val, col: val" row strings column-wise with
+        # vectorized Series ops instead of a per-row iterrows() loop;
+        # NaN cells contribute nothing, matching the old per-row filter.
+        row_texts = pd.Series("", index=df.index)
+        for j, header in enumerate(headers):
+            col = df.iloc[:, j]
+            formatted = header + ": " + col.astype(str).str.strip() + ", "
+            row_texts = row_texts + formatted.where(col.notna(), "")
+        row_texts = row_texts.str.replace(r", $", "", regex=True)
+
+        table_chunks.extend(
+            {
                 "text": row_text,
                 "is_table": True,
                 "sheet_name": sheet_name,
                 "row_index": row_idx + 1,
                 "headers": headers
-            })
+            }
+            for row_idx, row_text in zip(df.index, row_texts.to_numpy())
+        )
     return table_chunks
-
-
-def preprocess_text(text: str) -> str:
-    """Basic text cleaning."""
-    text = re.sub(r'\s+', ' ', text)  # Collapse whitespace
-    text = text.strip()
-    return text
@@ -2,16 +2,17 @@ from sentence_transformers import SentenceTransformer
 from typing import List, Dict, Any, Optional, Union, Tuple
 import os
 import gc
+import threading
 import torch
 import numpy as np
-import logging
 import time
 import psutil
+from collections import OrderedDict
 from functools import wraps
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
+from backend.services.logging_config import get_logger
+
+logger = get_logger(__name__)
 
 # Initialize the BAAI Large embedding model
 MODEL_NAME = "BAAI/bge-large-en-v1.5"
@@ -26,7 +27,7 @@ def timer_decorator(func):
         start_time = time.time()
         result = func(*args, **kwargs)
         end_time = time.time()
-        logger.info(f"{func.__name__} executed in {end_time - start_time:.2f} seconds")
+        logger.info("%s executed in %.2f seconds", func.__name__, end_time - start_time)
         return result
     return wrapper
 
@@ -47,8 +48,32 @@ def get_embedding_model():
             
             # Load model with optimized settings
             device = "cuda" if torch.cuda.is_available() else "cpu"
+
+            if device == "cpu":
+                # One intra-op thread per physical core: hyperthread
+                # siblings share FP units, so logical-core counts just add
+                # scheduler churn to the matmuls. A single inter-op thread
+                # avoids oversubscription between ops. interop must be set
+                # before any parallel op has run, hence best-effort.
+                physical = psutil.cpu_count(logical=False) or os.cpu_count() or 1
+                torch.set_num_threads(physical)
+                try:
+                    torch.set_num_interop_threads(1)
+                except RuntimeError:
+                    logger.debug("Inter-op thread count already fixed; skipping.")
+
             model = SentenceTransformer(MODEL_NAME, device=device)
-            
+
+            if device == "cpu":
+                # Dynamic INT8 quantization of the linear layers: the
+                # matmuls run 2-4x faster on AVX2/VNNI CPUs with minimal
+                # embedding drift. Ingest and query embeddings both come
+                # from the same quantized model, so similarities stay
+                # consistent.
+                model[0].auto_model = torch.quantization.quantize_dynamic(
+                    model[0].auto_model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+
             # Log memory usage after loading
             process = psutil.Process(os.getpid())
             memory_info = process.memory_info()
@@ -81,7 +106,7 @@ def generate_embeddings(texts: List[str]) -> List[List[float]]:
         # Process in batches to reduce memory usage
         for i in range(0, len(texts), BATCH_SIZE):
             batch_texts = texts[i:i+BATCH_SIZE]
-            logger.info(f"Processing batch {i//BATCH_SIZE + 1}/{(len(texts)-1)//BATCH_SIZE + 1} with {len(batch_texts)} texts")
+            logger.info("Processing batch %d/%d with %d texts", i // BATCH_SIZE + 1, (len(texts) - 1) // BATCH_SIZE + 1, len(batch_texts))
             
             # Generate embeddings for the current batch
             batch_embeddings = model.encode(
@@ -111,33 +136,84 @@ def generate_embeddings(texts: List[str]) -> List[List[float]]:
 def generate_query_embedding(query: str) -> Optional[List[float]]:
     """
     Generate embedding for a query with error handling
-    
+
+    Goes through the batch path so single-query callers share the same
+    LRU cache as the expansion pipeline.
+
     Args:
         query: The query text
-        
+
     Returns:
         Optional[List[float]]: The query embedding or None if error
     """
     if not query or not query.strip():
         logger.warning("Empty query provided for embedding generation")
         return None
-    
+
+    embeddings = generate_query_embeddings_batch([query])
+    return embeddings[0] if embeddings else None
+
+# Small LRU for query-text embeddings; repeated questions and re-used
+# expansions skip the encoder entirely. OrderedDict mutation is not
+# atomic, so all access goes through the lock - query handling runs on
+# asyncio.to_thread workers while the file watcher's pool shares the
+# process. The lock is dropped around the encoder call itself.
+_QUERY_EMB_CACHE_SIZE = 256
+_query_emb_cache: "OrderedDict[str, List[float]]" = OrderedDict()
+_query_emb_lock = threading.Lock()
+
+
+@timer_decorator
+def generate_query_embeddings_batch(texts: List[str]) -> List[List[float]]:
+    """
+    Generate embeddings for several query strings in one encoder pass.
+
+    Cache hits cost nothing; the misses share a single batched forward pass
+    instead of one transformer inference per text.
+
+    Args:
+        texts: The query strings
+
+    Returns:
+        List[List[float]]: One embedding per input text, or [] on error
+    """
+    if not texts:
+        return []
+
     try:
-        model = get_embedding_model()
-        
-        # Generate embedding
-        embedding = model.encode(
-            query, 
-            convert_to_numpy=True,
-            normalize_embeddings=True  # Normalize for better similarity search
-        )
-        
-        # Convert numpy array to list for JSON serialization
-        return embedding.tolist()
-    
+        unique = list(dict.fromkeys(texts))
+        with _query_emb_lock:
+            hits = {}
+            for text in unique:
+                cached = _query_emb_cache.get(text)
+                if cached is not None:
+                    _query_emb_cache.move_to_end(text)
+                    hits[text] = cached
+        misses = [t for t in unique if t not in hits]
+
+        if misses:
+            # Encode outside the lock; a concurrent duplicate encode is
+            # cheaper than serializing all callers behind the model.
+            model = get_embedding_model()
+            encoded = model.encode(
+                misses,
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            )
+            with _query_emb_lock:
+                for text, embedding in zip(misses, encoded):
+                    embedding = embedding.tolist()
+                    _query_emb_cache[text] = embedding
+                    hits[text] = embedding
+                while len(_query_emb_cache) > _QUERY_EMB_CACHE_SIZE:
+                    _query_emb_cache.popitem(last=False)
+
+        return [hits[text] for text in texts]
+
     except Exception as e:
-        logger.error(f"Error generating query embedding: {str(e)}")
-        return None
+        logger.error(f"Error generating query embeddings: {str(e)}")
+        return []
+
 
 def batch_process_texts(texts: List[str], batch_size: int = BATCH_SIZE) -> List[List[float]]:
     """
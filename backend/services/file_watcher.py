@@ -1,91 +1,212 @@
 import time
 import os
 import threading
-import logging
+from concurrent.futures import ThreadPoolExecutor
 from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-from watchdog.observers.polling import PollingObserver
+from watchdog.events import FileSystemEventHandler, PatternMatchingEventHandler
 
 from backend.services.document_processor import process_document, remove_document
+from backend.services.logging_config import get_logger
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, 
-                    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
 
 # Path to monitor
 WATCH_PATH = r"D:\knowledge base\Document for test"
-# Set to True to use polling observer (more reliable but higher CPU usage)
-USE_POLLING_OBSERVER = True
-# Polling interval in seconds (only used if USE_POLLING_OBSERVER is True)
-POLLING_INTERVAL = 2
 
-class DocumentHandler(FileSystemEventHandler):
+# Document patterns handled by the watcher; everything else (Office ~$ lock
+# files, hidden/temp files, directories) is filtered inside watchdog's
+# dispatch before our handler code runs.
+SUPPORTED_PATTERNS = ['*.pdf', '*.docx', '*.doc', '*.txt', '*.xlsx', '*.xls', '*.csv']
+IGNORE_PATTERNS = ['*/~$*', '*/.*', '*/~*']
+SUPPORTED_EXTS = frozenset({'.pdf', '.docx', '.doc', '.txt', '.xlsx', '.xls', '.csv'})
+
+# Bounded pool that does the actual document processing, so the watchdog
+# dispatcher thread only enqueues work and keeps draining OS events even
+# while a burst of files is being indexed.
+_executor = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1))
+
+# Paths currently queued or being processed; suppresses duplicate submits
+_in_flight = set()
+_in_flight_lock = threading.Lock()
+
+# Modify events are coalesced per file: a save can emit dozens of writes, and
+# reprocessing only starts once the file has been quiet this long.
+MODIFY_DEBOUNCE_SECONDS = 2.0
+
+_pending_modifications: dict = {}   # path -> monotonic deadline
+_pending_lock = threading.Lock()
+_pending_event = threading.Event()
+
+# Recently handled paths mapped to a monotonic_ns expiry; duplicate events
+# inside the window are dropped. Shared across handlers and swept by the
+# housekeeping thread below.
+_recently_processed: dict = {}
+
+
+def _housekeeping_worker():
+    """Single timer thread for the watcher: fires due debounce deadlines and
+    expires dedup entries. Sleeps until the next deadline rather than
+    polling, and blocks indefinitely while there is nothing scheduled."""
+    while True:
+        due = []
+        timeout = None
+        with _pending_lock:
+            now = time.monotonic()
+            for path, deadline in list(_pending_modifications.items()):
+                if deadline <= now:
+                    due.append(path)
+                    del _pending_modifications[path]
+            if _pending_modifications:
+                timeout = min(_pending_modifications.values()) - now
+
+        # Sweep expired dedup entries while awake anyway
+        now_ns = time.monotonic_ns()
+        for path, expiry in list(_recently_processed.items()):
+            if expiry <= now_ns:
+                _recently_processed.pop(path, None)
+
+        for path in due:
+            _submit_processing(path, _process_updated_file)
+        _pending_event.wait(timeout)
+        _pending_event.clear()
+
+
+threading.Thread(target=_housekeeping_worker, daemon=True).start()
+
+
+def _submit_processing(file_path, task, *args, **kwargs):
+    """Run task(file_path, ...) on the worker pool, one job per path at a time."""
+    with _in_flight_lock:
+        if file_path in _in_flight:
+            logger.debug("Already queued, skipping: %s", file_path)
+            return
+        _in_flight.add(file_path)
+
+    def _run():
+        try:
+            return task(file_path, *args, **kwargs)
+        finally:
+            with _in_flight_lock:
+                _in_flight.discard(file_path)
+
+    _executor.submit(_run)
+
+
+class DocumentHandler(PatternMatchingEventHandler):
     def __init__(self):
-        super().__init__()
-        # Track processed files to avoid duplicate processing
-        self.recently_processed = set()
-        
+        super().__init__(
+            patterns=SUPPORTED_PATTERNS,
+            ignore_patterns=IGNORE_PATTERNS,
+            ignore_directories=True,
+            case_sensitive=False
+        )
+
     def on_created(self, event):
-        if not event.is_directory and self._should_process(event.src_path):
+        if self._should_process(event.src_path):
             logger.info(f"File created: {event.src_path}")
-            success = process_document(event.src_path)
-            if success:
-                logger.info(f"Successfully processed new file: {event.src_path}")
-            else:
-                logger.error(f"Failed to process new file: {event.src_path}")
+            _submit_processing(event.src_path, _process_new_file)
 
     def on_modified(self, event):
-        if not event.is_directory and self._should_process(event.src_path):
-            logger.info(f"File modified: {event.src_path}")
-            success = process_document(event.src_path, update=True)
-            if success:
-                logger.info(f"Successfully updated file: {event.src_path}")
-            else:
-                logger.error(f"Failed to update file: {event.src_path}")
+        # A fresh creation emits its own write events; inside the dedup
+        # window those belong to the on_created submission already in
+        # flight, and arming a debounce for them would reprocess the file
+        # a second time (full delete + re-extract + re-embed) ~2s later.
+        if _recently_processed.get(event.src_path, 0) > time.monotonic_ns():
+            logger.debug("File modified (recently handled): %s", event.src_path)
+            return
+        # Each event just pushes the file's deadline out; the debounce worker
+        # processes it once the writes stop. N writes -> one reprocess.
+        logger.debug("File modified: %s", event.src_path)
+        with _pending_lock:
+            _pending_modifications[event.src_path] = (
+                time.monotonic() + MODIFY_DEBOUNCE_SECONDS
+            )
+        _pending_event.set()
 
     def on_deleted(self, event):
-        if not event.is_directory:
-            logger.info(f"File deleted: {event.src_path}")
-            success = remove_document(event.src_path)
-            if success:
-                logger.info(f"Successfully removed file from database: {event.src_path}")
-            else:
-                logger.error(f"Failed to remove file from database: {event.src_path}")
+        logger.info(f"File deleted: {event.src_path}")
+        _submit_processing(event.src_path, _process_deleted_file)
     
     def _should_process(self, file_path):
         """
-        Check if file should be processed (avoid duplicates and non-document files)
+        Check if file was recently processed (to avoid duplicate events).
+        Extension and temp/hidden-file filtering already happened in
+        watchdog's pattern dispatch.
         """
-        # Get filename and extension
-        filename = os.path.basename(file_path)
-        _, ext = os.path.splitext(file_path.lower())
-        supported_extensions = ['.pdf', '.docx', '.doc', '.txt', '.xlsx', '.xls', '.csv']
-        
-        # Skip files with unsupported extensions
-        if ext not in supported_extensions:
+        now = time.monotonic_ns()
+        if _recently_processed.get(file_path, 0) > now:
             return False
-            
-        # Skip Microsoft Office temporary files (start with ~$)
-        if filename.startswith('~$'):
-            logger.debug(f"Skipping temporary Office file: {file_path}")
-            return False
-            
-        # Skip hidden files and system files
-        if filename.startswith('.') or filename.startswith('~'):
-            logger.debug(f"Skipping hidden/system file: {file_path}")
-            return False
-            
-        # Check if file was recently processed (to avoid duplicate events)
-        if file_path in self.recently_processed:
-            return False
-            
-        # Add to recently processed set and schedule removal after 2 seconds
-        self.recently_processed.add(file_path)
-        threading.Timer(2, lambda: self.recently_processed.remove(file_path)).start()
-        
+
+        # Remember this file for 2 seconds to absorb duplicate events;
+        # the housekeeping thread sweeps expired entries.
+        _recently_processed[file_path] = now + 2_000_000_000
+
         return True
 
+
+class _DirectoryWatchHandler(FileSystemEventHandler):
+    """Adds watches for directories created after startup.
+
+    The startup walk only schedules directories that already exist, and
+    DocumentHandler ignores directory events entirely, so without this a
+    subfolder created at runtime would never be watched and its files
+    would stay invisible until the next restart.
+    """
+
+    def __init__(self, observer, file_handler):
+        self._observer = observer
+        self._file_handler = file_handler
+
+    def on_created(self, event):
+        if not event.is_directory:
+            return
+        logger.info(f"Directory created: {event.src_path}")
+        _schedule_tree(self._observer, self._file_handler, self, event.src_path)
+        # Files moved in along with the directory predate its watch and
+        # produced no events; pick them up with a scan.
+        try:
+            for file_path in _iter_document_files(event.src_path):
+                _submit_processing(file_path, _process_new_file)
+        except OSError as e:
+            logger.error(f"Error scanning new directory {event.src_path}: {e}")
+
+
+def _schedule_tree(observer, file_handler, dir_handler, path):
+    """Adds non-recursive watches on path and every directory below it.
+
+    Scheduling an already-watched (path, recursive) pair just attaches the
+    handlers to the existing emitter, so overlap with a prior walk is safe.
+    """
+    observer.schedule(file_handler, path, recursive=False)
+    observer.schedule(dir_handler, path, recursive=False)
+    for root, dirs, _ in os.walk(path):
+        for d in dirs:
+            child = os.path.join(root, d)
+            observer.schedule(file_handler, child, recursive=False)
+            observer.schedule(dir_handler, child, recursive=False)
+
+
+def _process_new_file(file_path):
+    if process_document(file_path):
+        logger.info(f"Successfully processed new file: {file_path}")
+    else:
+        logger.error(f"Failed to process new file: {file_path}")
+
+
+def _process_updated_file(file_path):
+    if process_document(file_path, update=True):
+        logger.info(f"Successfully updated file: {file_path}")
+    else:
+        logger.error(f"Failed to update file: {file_path}")
+
+
+def _process_deleted_file(file_path):
+    if remove_document(file_path):
+        logger.info(f"Successfully removed file from database: {file_path}")
+    else:
+        logger.error(f"Failed to remove file from database: {file_path}")
+
+
 # Global observer reference to prevent garbage collection
 _observer = None
 
@@ -105,18 +226,21 @@ def run_file_watcher():
     
     while True:
         try:
-            # Create observer based on configuration
-            if USE_POLLING_OBSERVER:
-                _observer = PollingObserver(timeout=POLLING_INTERVAL)
-                logger.info(f"Using polling observer with interval {POLLING_INTERVAL}s")
-            else:
-                _observer = Observer()
-                logger.info("Using standard file system observer")
-                
+            # Native OS observer: inotify on Linux, ReadDirectoryChangesW on
+            # Windows. The kernel pushes events to us instead of the old
+            # polling observer re-stat()ing the whole tree every 2 seconds.
+            _observer = Observer()
+            logger.info("Using native file system observer")
+
+
             event_handler = DocumentHandler()
-            
-            # Schedule the observer
-            _observer.schedule(event_handler, WATCH_PATH, recursive=True)
+            dir_handler = _DirectoryWatchHandler(_observer, event_handler)
+
+            # One narrow, non-recursive watch per directory instead of a
+            # blanket recursive watch on the root: events only fan out to the
+            # directory they occurred in. The directory handler extends the
+            # set whenever a subdirectory appears at runtime.
+            _schedule_tree(_observer, event_handler, dir_handler, WATCH_PATH)
             
             # Start the observer
             _observer.start()
@@ -124,14 +248,12 @@ def run_file_watcher():
             
             # Process existing files on startup
             process_existing_files()
-            
-            # Keep the thread alive
-            while True:
-                time.sleep(1)
-                if not _observer.is_alive():
-                    logger.error("Observer stopped unexpectedly, restarting...")
-                    break
-                    
+
+            # Block until the observer thread exits instead of polling
+            # is_alive() every second; join returns only on failure.
+            _observer.join()
+            logger.error("Observer stopped unexpectedly, restarting...")
+
         except Exception as e:
             logger.error(f"Error in file watcher: {str(e)}")
             
@@ -148,27 +270,33 @@ def run_file_watcher():
             logger.info("Restarting file watcher in 5 seconds...")
             time.sleep(5)
 
+def _iter_document_files(directory):
+    """Yields supported document paths under directory via os.scandir.
+
+    Name-based filters run before any stat, and DirEntry.is_file uses the
+    dirent type from the directory read itself, so the scan costs roughly
+    one getdents64 per directory instead of one stat per file.
+    """
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            name = entry.name
+            if name.startswith('~$') or name.startswith('.') or name.startswith('~'):
+                logger.debug(f"Skipping temporary/hidden file: {entry.path}")
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_document_files(entry.path)
+            elif (os.path.splitext(name)[1].lower() in SUPPORTED_EXTS
+                    and entry.is_file(follow_symlinks=False)):
+                yield entry.path
+
 def process_existing_files():
     """Process all existing files in the watch directory on startup"""
     logger.info(f"Processing existing files in {WATCH_PATH}")
-    
+
     try:
-        for root, _, files in os.walk(WATCH_PATH):
-            for filename in files:
-                file_path = os.path.join(root, filename)
-                if os.path.isfile(file_path):
-                    # Skip non-document files
-                    _, ext = os.path.splitext(file_path.lower())
-                    supported_extensions = ['.pdf', '.docx', '.doc', '.txt', '.xlsx', '.xls', '.csv']
-                    
-                    # Skip temporary Office files and hidden files
-                    if filename.startswith('~$') or filename.startswith('.') or filename.startswith('~'):
-                        logger.debug(f"Skipping temporary/hidden file: {file_path}")
-                        continue
-                    
-                    if ext in supported_extensions:
-                        logger.info(f"Processing existing file: {file_path}")
-                        process_document(file_path)
+        for file_path in _iter_document_files(WATCH_PATH):
+            logger.info(f"Processing existing file: {file_path}")
+            _submit_processing(file_path, _process_new_file)
     except Exception as e:
         logger.error(f"Error processing existing files: {str(e)}")
 
@@ -1,9 +1,12 @@
 import logging
 from typing import List, Dict, Any, Callable
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
+import numpy as np
+
+from backend.services.logging_config import get_logger
+
+logger = get_logger(__name__)
+logger.setLevel(logging.DEBUG)
 
 
 def normalize_scores(results: List[Dict[str, Any]], score_key: str, normalized_key: str):
@@ -11,18 +14,22 @@ def normalize_scores(results: List[Dict[str, Any]], score_key: str, normalized_k
     if not results:
         return
 
-    scores = [r.get(score_key, 0.0) for r in results if r.get(score_key) is not None]
-    if not scores:
-        return
+    # One vectorized pass for min/max and the rescale instead of a Python
+    # loop doing per-element arithmetic.
+    arr = np.fromiter(
+        (r.get(score_key) or 0.0 for r in results),
+        dtype=np.float32, count=len(results)
+    )
+    min_score = float(arr.min())
+    max_score = float(arr.max())
 
-    min_score, max_score = min(scores), max(scores)
+    if max_score == min_score:
+        norm = np.full_like(arr, 0.0 if min_score == 0 else 1.0)
+    else:
+        norm = (arr - min_score) / (max_score - min_score)
 
-    for r in results:
-        score = r.get(score_key, 0.0)
-        if max_score == min_score:
-            r[normalized_key] = 0.0 if min_score == 0 else 1.0
-        else:
-            r[normalized_key] = (score - min_score) / (max_score - min_score)
+    for r, v in zip(results, norm.tolist()):
+        r[normalized_key] = v
 
 
 def hybrid_search(
@@ -47,48 +54,69 @@ def hybrid_search(
     # If not, you would normalize them here, e.g.:
     # normalize_scores(vector_results, score_key="score", normalized_key="vec_norm")
 
-    # Merge results using a unique identifier (e.g., a tuple of document_name and chunk_index)
-    merged = {}
+    # Merge into a structure-of-arrays: the dict only maps the integer chunk
+    # id (document-name hash folded with the chunk index) to a row number,
+    # and the scores live in parallel columns so the weighted combination
+    # below runs as one vectorized kernel instead of per-dict arithmetic.
+    row_of: Dict[int, int] = {}
+    meta: List[tuple] = []            # row -> (document_name, chunk_index, text)
+    bm25_col: List[float] = []
+    vec_col: List[float] = []
 
     for r in bm25_results:
-        # A unique key for each chunk
-        chunk_key = (r.get("document_name"), r.get("chunk_index"))
-        if not all(k is not None for k in chunk_key):
+        document_name, chunk_index = r.get("document_name"), r.get("chunk_index")
+        if document_name is None or chunk_index is None:
             continue
-        merged[chunk_key] = {
-            "document_name": r.get("document_name"),
-            "text": r.get("text"),
-            "bm25_norm": r.get("bm25_norm", 0.0),
-            "vec_norm": 0.0
-        }
+        row_of[hash(document_name) ^ chunk_index] = len(meta)
+        meta.append((document_name, chunk_index, r.get("text")))
+        bm25_col.append(r.get("bm25_norm", 0.0))
+        vec_col.append(0.0)
 
     for r in vector_results:
-        chunk_key = (r.get("document_name"), r.get("chunk_index"))
-        if not all(k is not None for k in chunk_key):
+        document_name, chunk_index = r.get("document_name"), r.get("chunk_index")
+        if document_name is None or chunk_index is None:
             continue
-
-        if chunk_key in merged:
-            merged[chunk_key]["vec_norm"] = r.get("vec_norm", 0.0)
+        row = row_of.get(hash(document_name) ^ chunk_index)
+        if row is not None:
+            vec_col[row] = r.get("vec_norm", 0.0)
         else:
-            merged[chunk_key] = {
-                "document_name": r.get("document_name"),
-                "text": r.get("text"),
-                "bm25_norm": 0.0,
-                "vec_norm": r.get("vec_norm", 0.0)
-            }
-
-    # Calculate combined score and filter out incomplete entries
-    results = []
-    for chunk_key, scores in merged.items():
-        if scores.get("document_name") and scores.get("text"):
-            scores["combined"] = (bm25_weight * scores["bm25_norm"]) + (vector_weight * scores["vec_norm"])
-            results.append(scores)
-
-    # Sort by the new combined score
-    results.sort(key=lambda x: x["combined"], reverse=True)
+            row_of[hash(document_name) ^ chunk_index] = len(meta)
+            meta.append((document_name, chunk_index, r.get("text")))
+            bm25_col.append(0.0)
+            vec_col.append(r.get("vec_norm", 0.0))
+
+    if not meta:
+        return []
+
+    combined = (bm25_weight * np.asarray(bm25_col, dtype=np.float32)
+                + vector_weight * np.asarray(vec_col, dtype=np.float32))
+
+    # Push rows missing essential metadata below every real score
+    valid = np.fromiter((bool(text) for _, _, text in meta), dtype=bool, count=len(meta))
+    combined = np.where(valid, combined, -np.inf)
+
+    # argpartition is O(N); only the top_k survivors get sorted and
+    # materialized back into result dicts.
+    k = min(top_k, combined.size)
+    top_idx = np.argpartition(combined, -k)[-k:]
+    top_idx = top_idx[np.argsort(combined[top_idx])[::-1]]
+
+    top_results = []
+    for i in top_idx:
+        document_name, chunk_index, text = meta[i]
+        if not text:
+            continue
+        top_results.append({
+            "document_name": document_name,
+            "chunk_index": chunk_index,
+            "text": text,
+            "bm25_norm": bm25_col[i],
+            "vec_norm": vec_col[i],
+            "combined": float(combined[i])
+        })
 
     # Log the top results for debugging
-    top_results_log = [(r['document_name'], round(r['combined'], 4)) for r in results[:5]]
+    top_results_log = [(r['document_name'], round(r['combined'], 4)) for r in top_results[:5]]
     logger.debug("Hybrid top results: %s", top_results_log)
 
-    return results[:top_k]
+    return top_results
@@ -1,16 +1,131 @@
-import logging
+import hashlib
+import json
+import os
 import re
+import threading
+import time
+from collections import OrderedDict
 from typing import List, Dict, Any
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-# This is a placeholder for your actual LLM client, e.g., OpenAI, Anthropic, etc.
-# from your_llm_client import call_llm
+# orjson parses the long completion payloads several times faster than the
+# stdlib json module; fall back transparently when it is not installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_dumps(obj):
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+
+def _json_loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+from backend.services.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Local OpenAI-compatible LLM server (LM Studio, Ollama, llama.cpp, ...)
+LLM_API_URL = os.environ.get('LLM_API_URL', 'http://localhost:1234/v1')
+LLM_MODEL = os.environ.get('LLM_MODEL', 'local-model')
+
+# One persistent session for all LLM traffic: keep-alive pooling avoids a
+# fresh TCP+TLS handshake per call, and transient 429/5xx responses retry
+# with backoff instead of surfacing immediately.
+_SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.3,
+                      status_forcelist=[429, 500, 502, 503, 504])
+)
+_SESSION.mount('http://', _adapter)
+_SESSION.mount('https://', _adapter)
+
+
+# Positive ensure_model_loaded results are cached for this long; health
+# probes hitting it frequently then cost zero network I/O.
+_MODEL_CHECK_TTL = 300.0
+_model_cache = (0.0, False)  # (checked_at monotonic, result)
+
+
+def ensure_model_loaded() -> bool:
+    """Checks that the local LLM server is up and has a model available.
+
+    A successful check is memoized for _MODEL_CHECK_TTL seconds; failures
+    are never cached, so the next call probes the server again.
+    """
+    global _model_cache
+    checked_at, ok = _model_cache
+    if ok and time.monotonic() - checked_at < _MODEL_CHECK_TTL:
+        return True
+    try:
+        resp = _SESSION.get(f"{LLM_API_URL}/models", timeout=5)
+        resp.raise_for_status()
+        ok = bool(_json_loads(resp.content).get('data'))
+        _model_cache = (time.monotonic(), ok)
+        return ok
+    except Exception as e:
+        logger.warning("LLM server not reachable at %s: %s", LLM_API_URL, e)
+        _model_cache = (0.0, False)
+        return False
+
+
+def generate_response_stream(prompt: str, temperature: float = 0.2):
+    """Streams a completion from the local LLM server, yielding text deltas.
+
+    SSE streaming means the first tokens arrive as soon as the model emits
+    them instead of after the whole completion is generated, so callers can
+    start forwarding output immediately.
+    """
+    payload = {
+        "model": LLM_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": temperature,
+        "stream": True,
+    }
+    resp = _SESSION.post(f"{LLM_API_URL}/chat/completions",
+                         data=_json_dumps(payload),
+                         headers={'Content-Type': 'application/json'},
+                         stream=True, timeout=60)
+    resp.raise_for_status()
+    try:
+        for line in resp.iter_lines():
+            if not line:
+                continue
+            frame = line.decode('utf-8')
+            if not frame.startswith('data: '):
+                continue
+            data = frame[len('data: '):]
+            if data == '[DONE]':
+                break
+            delta = _json_loads(data)['choices'][0].get('delta', {})
+            content = delta.get('content')
+            if content:
+                yield content
+    finally:
+        resp.close()
+
+
+def generate_response(prompt: str, temperature: float = 0.2) -> str:
+    """Sends a prompt to the local LLM server and returns the full completion."""
+    return "".join(generate_response_stream(prompt, temperature)).strip()
 
 STOPWORDS = {'a', 'an', 'the', 'is', 'in', 'it', 'of', 'for', 'on', 'with', 'what', 'who', 'all', 'list'}
 
+# Compiled once at import; call_llm runs these on every query
+_NONWORD_RE = re.compile(r"[^\w\s']")
+_POSSESSIVE_RE = re.compile(r"'s\b")
+
 def call_llm(prompt: str, temperature: float = 0.0) -> str:
     """
     (Placeholder) Replace this with your actual LLM API call.
@@ -30,11 +145,11 @@ def call_llm(prompt: str, temperature: float = 0.0) -> str:
 
     question = question_section[1].split("\n\n")[0].strip()
     # Clean question and extract keywords
-    cleaned_question = re.sub(r"[^\w\s']", '', question.lower()) # keep apostrophes for possessives
-    cleaned_question = re.sub(r"'s\b", '', cleaned_question) # remove possessives
+    cleaned_question = _NONWORD_RE.sub('', question.lower()) # keep apostrophes for possessives
+    cleaned_question = _POSSESSIVE_RE.sub('', cleaned_question) # remove possessives
     keywords = {word for word in cleaned_question.split() if word not in STOPWORDS and len(word) >= 2}
 
-    logger.info(f"Question: '{question}', Keywords: {keywords}")
+    logger.debug("Question: %r, Keywords: %s", question, keywords)
 
     scored_chunks = []
     for chunk in evidence.split("---"):
@@ -50,13 +165,16 @@ def call_llm(prompt: str, temperature: float = 0.0) -> str:
         if not chunk_text:
             continue
 
-        score = 0
-        cleaned_chunk = chunk_text.lower()
-        for keyword in keywords:
-            if keyword in cleaned_chunk:
-                score += 1
+        # Tokenize the chunk once and intersect hashed sets; each keyword
+        # costs one dict probe instead of a substring scan over the chunk.
+        # The chunk gets the same cleaning pass as the question, otherwise
+        # punctuation stays glued to the tokens ("alice," != "alice").
+        cleaned_chunk = _NONWORD_RE.sub('', chunk_text.lower())
+        cleaned_chunk = _POSSESSIVE_RE.sub('', cleaned_chunk)
+        chunk_tokens = set(cleaned_chunk.split())
+        score = len(keywords & chunk_tokens)
 
-        logger.info(f"Chunk: '{chunk_text}', Score: {score}")
+        logger.debug("Chunk: %r, Score: %d", chunk_text, score)
         scored_chunks.append((score, chunk_text))
 
     scored_chunks.sort(key=lambda x: x[0], reverse=True)
@@ -66,10 +184,26 @@ def call_llm(prompt: str, temperature: float = 0.0) -> str:
         return "I don't know. The provided documents do not contain this information."
 
     top_chunk_text = scored_chunks[0][1]
-    logger.info(f"Top chunk: '{top_chunk_text}'")
+    logger.debug("Top chunk: %r", top_chunk_text)
     return top_chunk_text
 
 
+# Answer cache keyed by SHA256(question + chunk identities); repeated
+# questions over the same retrieved chunks skip the LLM roundtrip entirely.
+# Queries run on asyncio.to_thread workers, so all cache access goes
+# through the lock; it is dropped around the LLM call itself.
+_ANSWER_CACHE_SIZE = 256
+_answer_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_answer_cache_lock = threading.Lock()
+
+
+def _answer_cache_key(question: str, chunks: List[Dict[str, Any]]) -> str:
+    chunk_ids = sorted(
+        f"{c.get('document_name', 'unknown')}:{c.get('chunk_index')}" for c in chunks
+    )
+    return hashlib.sha256((question + "|" + "|".join(chunk_ids)).encode()).hexdigest()
+
+
 def answer_from_chunks(question: str, chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
     Generates an answer strictly from the provided chunks.
@@ -81,6 +215,31 @@ def answer_from_chunks(question: str, chunks: List[Dict[str, Any]]) -> Dict[str,
             "sources": []
         }
 
+    # Drop exact-duplicate chunk texts before prompt assembly; duplicated
+    # evidence wastes context tokens and LLM compute. An 8-byte blake2b
+    # digest per chunk keeps the seen-set small.
+    seen_digests = set()
+    unique_chunks = []
+    for c in chunks:
+        text = c.get('text')
+        if text:
+            digest = hashlib.blake2b(text.encode(), digest_size=8).digest()
+            if digest in seen_digests:
+                continue
+            seen_digests.add(digest)
+        unique_chunks.append(c)
+    chunks = unique_chunks
+
+    cache_key = _answer_cache_key(question, chunks)
+    with _answer_cache_lock:
+        cached = _answer_cache.get(cache_key)
+        if cached is not None:
+            _answer_cache.move_to_end(cache_key)
+            cached = dict(cached)
+    if cached is not None:
+        logger.info("Answer cache hit for the query.")
+        return cached
+
     # Combine chunks into an evidence string
     evidence = ""
     for c in chunks:
@@ -108,11 +267,24 @@ def answer_from_chunks(question: str, chunks: List[Dict[str, Any]]) -> Dict[str,
         logger.error("LLM API call failed: %s", e, exc_info=True)
         response = "Error: Could not connect to the language model."
 
-    # Extract unique sources
+    # Extract unique sources. call_llm answers with one chunk's exact text,
+    # so the grounding documents are the ones whose text equals the
+    # response - an O(N) equality pass instead of the old substring scan
+    # over every chunk's full text.
     sources = []
     if "I don't know" not in response:
-        # Fallback to check if response is a substring of any chunk text
-        sources = sorted(list({c.get("document_name", "unknown") for c in chunks if c.get("document_name") and response in c.get('text', '')}))
+        sources = sorted({
+            c["document_name"] for c in chunks
+            if c.get("document_name") and c.get("text") == response
+        })
+
+    result = {"answer": response, "sources": sources}
 
+    # Only cache real answers; errors and fallbacks should retry next time
+    if not response.startswith("Error:"):
+        with _answer_cache_lock:
+            _answer_cache[cache_key] = dict(result)
+            while len(_answer_cache) > _ANSWER_CACHE_SIZE:
+                _answer_cache.popitem(last=False)
 
-    return {"answer": response, "sources": sources}
+    return result
@@ -1,18 +1,35 @@
+import atexit
 import logging
 import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
 
 LOGS_DIR = "logs"
 if not os.path.exists(LOGS_DIR):
     os.makedirs(LOGS_DIR)
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(name)s - %(message)s',
-    handlers=[
-        logging.FileHandler(os.path.join(LOGS_DIR, "processing.log")),
-        logging.StreamHandler()
-    ]
-)
+# All records go onto an in-memory queue and are written by one background
+# listener thread, so file/console I/O never blocks the thread that logged
+# (watchdog dispatch, upload workers, request handlers).
+_log_queue = queue.SimpleQueue()
+
+_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(name)s - %(message)s')
+
+_file_handler = logging.FileHandler(os.path.join(LOGS_DIR, "processing.log"))
+_file_handler.setFormatter(_formatter)
+
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(_formatter)
+
+_root = logging.getLogger()
+_root.setLevel(logging.INFO)
+_root.addHandler(QueueHandler(_log_queue))
+
+_listener = QueueListener(_log_queue, _file_handler, _stream_handler,
+                          respect_handler_level=True)
+_listener.start()
+atexit.register(_listener.stop)
+
 
 def get_logger(name):
     return logging.getLogger(name)
@@ -0,0 +1,63 @@
+"""Single-page PDF extraction worker, kept in its own light module.
+
+ProcessPoolExecutor workers import the module that defines the function
+they run. When that was document_processor, each worker transitively
+imported the whole embedding stack (qdrant_service -> embedding_service
+-> torch), costing seconds of startup and hundreds of MB per worker.
+This module's imports stop at the PDF parsers and utils, so pool workers
+start light.
+"""
+from typing import List, Dict, Any, Tuple
+
+import fitz  # PyMuPDF
+import pdfplumber
+
+from backend.services.utils import adaptive_sentence_chunks, preprocess_text
+
+
+def extract_pdf_page(args: Tuple[str, int]) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """Worker: extracts text chunks and table rows from a single PDF page.
+
+    Module-level so it can be pickled into a worker process; each worker
+    opens its own pdfplumber handle.
+    """
+    file_path, page_index = args
+    text_chunks, table_chunks = [], []
+
+    # Page text via PyMuPDF: pdfplumber rebuilds layout in pure Python and is
+    # several times slower, so keep it only for table extraction below.
+    doc = fitz.open(file_path)
+    try:
+        page_text = doc[page_index].get_text("text") or ""
+    finally:
+        doc.close()
+    if page_text:
+        clean_text = preprocess_text(page_text)
+        chunks = adaptive_sentence_chunks(clean_text, min_words=8)
+        for chunk in chunks:
+            text_chunks.append(chunk)
+
+    with pdfplumber.open(file_path) as pdf:
+        page = pdf.pages[page_index]
+
+        # extract_tables does O(edges^2) clustering; skip it on pages with no
+        # ruled content, which covers most prose pages.
+        if len(page.edges) < 4 and len(page.curves) < 4:
+            tables = []
+        else:
+            tables = page.extract_tables()
+        for table_idx, table in enumerate(tables):
+            if not table: continue
+            headers = [str(h).strip() for h in table[0]] if table[0] else []
+            for row_idx, row in enumerate(table[1:], start=1):
+                row_data = {headers[j]: str(cell).strip() for j, cell in enumerate(row) if j < len(headers)}
+                row_text = ", ".join([f"{k}: {v}" for k, v in row_data.items()])
+                table_chunks.append({
+                    "text": row_text,
+                    "is_table": True,
+                    "page": page_index + 1,
+                    "table_index": table_idx,
+                    "row_index": row_idx,
+                    "headers": headers
+                })
+    return text_chunks, table_chunks
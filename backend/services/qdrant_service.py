@@ -1,24 +1,25 @@
+import hashlib
 import os
 import subprocess
 import time
-import uuid
-import logging
 import platform
 from typing import List, Dict, Any, Optional
+
+import numpy as np
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
 from qdrant_client.http.exceptions import UnexpectedResponse
 
 from backend.services.embedding_service import generate_embeddings
+from backend.services.logging_config import get_logger
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
 
 # Qdrant configuration
 QDRANT_PATH = r"/qdrant"
 QDRANT_COLLECTION = "knowledge_base"
 QDRANT_PORT = 6333
+QDRANT_GRPC_PORT = 6334
 QDRANT_HOST = "localhost"
 
 # Global Qdrant client
@@ -30,7 +31,17 @@ def get_qdrant_client() -> QdrantClient:
     if client is None:
         ensure_qdrant_running()
         try:
-            client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT, timeout=10.0)
+            # gRPC encodes the 1024-float query vectors as binary protobuf
+            # instead of JSON text, cutting per-call serialization CPU and
+            # bytes on the wire roughly in half. Keepalive pings stop idle
+            # channels from being torn down between bursts, so no request
+            # pays a fresh TCP handshake. grpc_options needs qdrant-client
+            # 1.9+ (see requirements.txt); older clients pass it through to
+            # the REST client, which rejects it.
+            client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT,
+                                  grpc_port=QDRANT_GRPC_PORT, prefer_grpc=True,
+                                  grpc_options={"grpc.keepalive_time_ms": 30000},
+                                  timeout=10.0)
         except Exception as e:
             logger.error(f"Failed to initialize Qdrant client: {e}")
             raise
@@ -56,18 +67,33 @@ def ensure_collection_exists():
             logger.info(f"Creating collection {QDRANT_COLLECTION}")
             client.create_collection(
                 collection_name=QDRANT_COLLECTION,
-                vectors_config=models.VectorParams(size=1024, distance=models.Distance.COSINE)
+                # FLOAT16 halves the storage of the full-precision originals
+                # kept for rescoring; bge embeddings lose nothing meaningful
+                # at half precision.
+                vectors_config=models.VectorParams(size=1024, distance=models.Distance.COSINE,
+                                                   datatype=models.Datatype.FLOAT16),
+                # INT8 scalar quantization: HNSW traversal reads 1 KB per
+                # vector instead of 4 KB. Originals stay on disk and the
+                # oversampled rescore pass below keeps recall intact.
+                quantization_config=models.ScalarQuantization(
+                    scalar=models.ScalarQuantizationConfig(
+                        type=models.ScalarType.INT8,
+                        quantile=0.99,
+                        always_ram=True
+                    )
+                )
             )
-        create_payload_indices()
+        create_payload_indices(client)
         logger.info(f"Collection '{QDRANT_COLLECTION}' is ready.")
     except Exception as e:
         logger.error(f"Error ensuring collection exists: {e}")
         raise
 
 
-def create_payload_indices():
+def create_payload_indices(client: Optional[QdrantClient] = None):
     try:
-        client = get_qdrant_client()
+        if client is None:
+            client = get_qdrant_client()
         # Common metadata keys we'll index for filters
         indices = [
             ("document_path", models.PayloadSchemaType.KEYWORD),
@@ -87,6 +113,21 @@ def create_payload_indices():
         logger.error(f"Failed to create payload indices: {e}", exc_info=True)
 
 
+def _chunk_point_id(document_path: str, chunk_index: int, chunk: str) -> int:
+    """Deterministic point id from the chunk's content.
+
+    blake2b avoids the per-chunk urandom syscall of uuid4, and stable ids
+    make re-ingesting an unchanged document an idempotent upsert instead of
+    creating duplicates. Qdrant accepts raw unsigned ints, which hash and
+    serialize cheaper than 36-char UUID strings.
+    """
+    digest = hashlib.blake2b(
+        f"{document_path}\x00{chunk_index}\x00{chunk}".encode("utf-8"),
+        digest_size=8
+    ).digest()
+    return int.from_bytes(digest, "little") & ((1 << 63) - 1)
+
+
 def store_document_embeddings(document_path: str, document_name: str, chunks: List[str],
                               embeddings: Optional[List[List[float]]] = None,
                               metadatas: Optional[List[Dict[str, Any]]] = None) -> bool:
@@ -100,29 +141,40 @@ def store_document_embeddings(document_path: str, document_name: str, chunks: Li
         if embeddings is None:
             embeddings = generate_embeddings(chunks)
 
-        if not embeddings or len(embeddings) != len(chunks):
+        if not len(embeddings) or len(embeddings) != len(chunks):
             logger.error("Embeddings length mismatch or empty for %s.", document_name)
             return False
 
+        # One contiguous float32 matrix instead of nested Python float lists:
+        # ~8x less intermediate memory per vector while the batch is staged.
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+
         points = []
         for i, (chunk, emb) in enumerate(zip(chunks, embeddings)):
-            point_id = str(uuid.uuid4())
-
             payload = metadatas[i].copy() if metadatas and i < len(metadatas) else {}
 
-            # Ensure base fields are consistently present
+            # Ensure base fields are consistently present; chunk_index from
+            # the caller wins so batched uploads keep document-wide indices
             payload["document_name"] = document_name
             payload["document_path"] = document_path
-            payload["chunk_index"] = i
+            payload["chunk_index"] = payload.get("chunk_index", i)
             payload["text"] = chunk
 
-            points.append(models.PointStruct(id=point_id, vector=emb, payload=payload))
+            point_id = _chunk_point_id(document_path, payload["chunk_index"], chunk)
+            points.append(models.PointStruct(id=point_id, vector=emb.tolist(), payload=payload))
 
-        # Upsert points in batches
-        batch_size = 128
-        for i in range(0, len(points), batch_size):
-            batch = points[i:i + batch_size]
-            client.upsert(collection_name=QDRANT_COLLECTION, points=batch, wait=False)
+        # upload_points (qdrant-client 1.9+, see requirements.txt) batches
+        # and serializes inside the client; for large point sets its worker
+        # pool parallelizes batch serialization and upload, which is the
+        # client-side ingestion bottleneck.
+        parallel = 1 if len(points) <= 512 else max(2, (os.cpu_count() or 2) // 2)
+        client.upload_points(
+            collection_name=QDRANT_COLLECTION,
+            points=points,
+            batch_size=512,
+            parallel=parallel,
+            wait=False
+        )
 
         logger.info("Upserted %d chunks for %s", len(chunks), document_name)
         return True
@@ -134,17 +186,18 @@ def store_document_embeddings(document_path: str, document_name: str, chunks: Li
 def delete_document(document_path: str) -> bool:
     try:
         client = get_qdrant_client()
+        # A bare Filter is accepted as the selector; skipping the
+        # FilterSelector wrapper saves a pydantic object per call, which
+        # adds up when the watcher deletes on every file change.
         client.delete(
             collection_name=QDRANT_COLLECTION,
-            points_selector=models.FilterSelector(
-                filter=models.Filter(
-                    must=[
-                        models.FieldCondition(
-                            key="document_path",
-                            match=models.MatchValue(value=document_path)
-                        )
-                    ]
-                )
+            points_selector=models.Filter(
+                must=[
+                    models.FieldCondition(
+                        key="document_path",
+                        match=models.MatchValue(value=document_path)
+                    )
+                ]
             )
         )
         logger.info(f"Deleted embeddings for document: {document_path}")
@@ -154,40 +207,93 @@ def delete_document(document_path: str) -> bool:
         return False
 
 
+# Search against the quantized vectors but rescore the oversampled
+# candidate set with the original floats to recover full precision.
+_QUANT_SEARCH_PARAMS = models.SearchParams(
+    quantization=models.QuantizationSearchParams(rescore=True, oversampling=2.0)
+)
+
+
+def _format_search_results(results) -> List[Dict[str, Any]]:
+    """Converts raw Qdrant hits into result dicts with normalized scores."""
+    out = []
+    for r in results:
+        payload = r.payload or {}
+        out.append({
+            "score": getattr(r, "score", None),
+            "document_name": payload.get("document_name"),
+            "text": payload.get("text"),
+            **payload
+        })
+
+    # Normalize vector scores in one vectorized pass instead of two
+    # Python-level loops over the hits
+    if out:
+        scores = np.fromiter((r.get('score') or 0.0 for r in out),
+                             dtype=np.float32, count=len(out))
+        rng = scores.max() - scores.min()
+        if rng:
+            norm = (scores - scores.min()) / rng
+        else:
+            norm = np.zeros_like(scores)
+        for r, v in zip(out, norm.tolist()):
+            r['vec_norm'] = v
+
+    return out
+
+
 def search_similar_chunks(query_embedding: List[float], top_k: int = 5) -> List[Dict[str, Any]]:
     try:
         client = get_qdrant_client()
-        results = client.search(collection_name=QDRANT_COLLECTION, query_vector=query_embedding, limit=top_k)
-        out = []
-        for r in results:
-            payload = r.payload or {}
-            out.append({
-                "score": getattr(r, "score", None),
-                "document_name": payload.get("document_name"),
-                "text": payload.get("text"),
-                **payload
-            })
-        
-        # Normalize vector scores
-        scores = [r.get('score', 0.0) or 0.0 for r in out]
-        if scores:
-            min_s, max_s = min(scores), max(scores)
-            for r in out:
-                score = r.get('score', 0.0) or 0.0
-                r['vec_norm'] = 0.0 if max_s == min_s else (score - min_s) / (max_s - min_s)
-
-        return out
+        results = client.search(collection_name=QDRANT_COLLECTION, query_vector=query_embedding,
+                                limit=top_k, search_params=_QUANT_SEARCH_PARAMS)
+        return _format_search_results(results)
     except Exception as e:
         logger.exception(f"Error searching similar chunks: {e}")
         return []
 
 
+def search_similar_chunks_batch(query_embeddings: List[List[float]],
+                                top_k: int = 5) -> List[List[Dict[str, Any]]]:
+    """Runs one search per embedding in a single Qdrant round-trip.
+
+    search_batch amortizes the RPC and request parsing across all expanded
+    queries instead of paying a full round-trip per sub-query.
+    """
+    if not query_embeddings:
+        return []
+    try:
+        client = get_qdrant_client()
+        requests = [
+            models.SearchRequest(vector=emb, limit=top_k, with_payload=True,
+                                 params=_QUANT_SEARCH_PARAMS)
+            for emb in query_embeddings
+        ]
+        batches = client.search_batch(collection_name=QDRANT_COLLECTION, requests=requests)
+        return [_format_search_results(results) for results in batches]
+    except Exception as e:
+        logger.exception(f"Error in batched similarity search: {e}")
+        return [[] for _ in query_embeddings]
+
+
+# Point counts change slowly relative to query volume; cache for this long
+# so hot paths do not pay an RPC per call.
+_COUNT_TTL = 30.0
+_count_cache = (0.0, 0)  # (checked_at monotonic, count)
+
+
 def count_documents() -> int:
     """Counts the total number of points (chunks) in the collection."""
+    global _count_cache
+    checked_at, cached = _count_cache
+    if time.monotonic() - checked_at < _COUNT_TTL:
+        return cached
     try:
         client = get_qdrant_client()
-        info = client.get_collection(collection_name=QDRANT_COLLECTION)
-        return int(getattr(info, "points_count", info.get("points_count", 0)))
+        # Server-side approximate counter; O(1) against the collection
+        count = int(client.count(collection_name=QDRANT_COLLECTION, exact=False).count)
+        _count_cache = (time.monotonic(), count)
+        return count
     except Exception as e:
         logger.exception(f"Error counting documents: {e}")
         return 0
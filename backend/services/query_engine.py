@@ -1,15 +1,130 @@
-import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional, Tuple
 
-from backend.services.embedding_service import generate_query_embedding
-from backend.services.qdrant_service import search_similar_chunks
+from backend.services.embedding_service import generate_query_embeddings_batch
+from backend.services.qdrant_service import search_similar_chunks_batch
+from backend.services.query_expansion_service import expand_query
+from backend.services.reranker_service import rerank_cross_encoder
 from backend.services.llm_service import answer_from_chunks
 from backend.services.hybrid_search import hybrid_search
 from backend.services.bm25_service import BM25Service
+from backend.services.logging_config import get_logger
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
+logger = get_logger(__name__)
+
+# Minimum fused score for an answer to be attempted at all
+_CONFIDENCE_THRESHOLD = 0.12
+
+# Easy-query early exit: when the best chunk is this strong and leads the
+# runner-up by this much, reranking and the remaining chunks are noise.
+_STRONG_THRESHOLD = 0.8
+_GAP_THRESHOLD = 0.15
+
+# Candidates fed to the cross-encoder, and survivors sent to the LLM
+_RERANK_CANDIDATES = 16
+_FINAL_TOP_K = 5
+
+# Out-of-scope early exit: raw score ceilings below which neither branch
+# found anything resembling the query, so fusion cannot rescue it. The
+# vector floor is raw cosine similarity; the BM25 floor is an Okapi score.
+_VEC_SCORE_FLOOR = 0.25
+_BM25_SCORE_FLOOR = 1.0
+
+# Runs the BM25 branch of retrieval concurrently with the embedding +
+# vector branch; one worker is enough since the caller drives the other
+# branch itself.
+_SEARCH_EXECUTOR = ThreadPoolExecutor(max_workers=2)
+
+
+def _merge_subquery_results(batches: List[List[Dict[str, Any]]],
+                            score_key: str) -> List[Dict[str, Any]]:
+    """Flattens per-sub-query result lists, keeping the best-scoring entry
+    for each (document_name, chunk_index)."""
+    best: Dict[Any, Dict[str, Any]] = {}
+    for results in batches:
+        for r in results:
+            key = (r.get("document_name"), r.get("chunk_index"))
+            current = best.get(key)
+            if current is None or (r.get(score_key) or 0.0) > (current.get(score_key) or 0.0):
+                best[key] = r
+    return list(best.values())
+
+
+# Full-retrieval cache: repeated (FAQ-style) questions skip query
+# expansion, embedding, Qdrant, BM25, and fusion entirely. Entries are
+# keyed by the normalized query plus the BM25 index version, so any
+# index mutation by the file watcher invalidates them implicitly.
+# OrderedDict mutation is not atomic and queries run on asyncio.to_thread
+# workers, so all access goes through the lock; it is dropped around
+# retrieval itself.
+_RETRIEVAL_CACHE_SIZE = 256
+_retrieval_cache: "OrderedDict[Tuple[str, int], List[Dict[str, Any]]]" = OrderedDict()
+_retrieval_cache_lock = threading.Lock()
+
+
+def _retrieve_top_chunks(query: str, bm25_service: BM25Service) -> Optional[List[Dict[str, Any]]]:
+    """Runs the full retrieval pipeline (expansion, vector + BM25 search,
+    fusion) for a query, returning None when no embedding could be made."""
+    # Query expansion + vector search. All sub-queries are embedded in a
+    # single cached encoder call and searched in one batched Qdrant request,
+    # so the expansion fan-out costs at most one model pass and one
+    # round-trip.
+    subqueries = expand_query(query) or [query]
+
+    # BM25 only needs the query strings, so it runs on a worker thread
+    # while this thread embeds and searches Qdrant; the hybrid step then
+    # waits for max(vector, bm25) instead of their sum.
+    bm25_future = _SEARCH_EXECUTOR.submit(
+        lambda: [bm25_service.query(sq, top_k=10) for sq in subqueries]
+    )
+
+    embeddings = generate_query_embeddings_batch(subqueries)
+    if not embeddings or len(embeddings) != len(subqueries):
+        bm25_future.cancel()
+        return None
+
+    vector_batches = search_similar_chunks_batch(embeddings, top_k=10)
+    vector_results = _merge_subquery_results(vector_batches, "vec_norm")
+
+    bm25_results = _merge_subquery_results(bm25_future.result(), "bm25_score")
+
+    # Obviously out-of-scope queries show up as low raw maxima in both
+    # branches; skip fusion entirely and let the caller's confidence check
+    # take the "I don't know" path.
+    vec_max = max((r.get("score") or 0.0 for r in vector_results), default=0.0)
+    bm25_max = max((r.get("bm25_score") or 0.0 for r in bm25_results), default=0.0)
+    if vec_max < _VEC_SCORE_FLOOR and bm25_max < _BM25_SCORE_FLOOR:
+        logger.info("Raw retrieval scores below floors (vec %.3f, bm25 %.3f); "
+                    "skipping fusion.", vec_max, bm25_max)
+        return []
+
+    # Hybrid fusion over a wider candidate set than the LLM will see
+    fused = hybrid_search(
+        query_text=query,
+        bm25_results=bm25_results,
+        vector_results=vector_results,
+        top_k=_RERANK_CANDIDATES
+    )
+
+    # Confidence gate on the fused scores (sorted, so [0] is the max)
+    if not fused or fused[0].get("combined", 0.0) < _CONFIDENCE_THRESHOLD:
+        return []
+
+    # A dominant top chunk answers alone: skip the cross-encoder and feed
+    # the LLM one chunk instead of five, cutting prompt size on queries
+    # where the extra context would not change the answer.
+    if (len(fused) > 1
+            and fused[0]["combined"] > _STRONG_THRESHOLD
+            and fused[0]["combined"] - fused[1]["combined"] > _GAP_THRESHOLD):
+        logger.info("Top chunk dominates; skipping rerank.")
+        return fused[:1]
+
+    # Cross-encoder pass over the candidates; precision here means fewer
+    # irrelevant chunks in the prompt, so the added forward pass usually
+    # pays for itself in LLM time.
+    return rerank_cross_encoder(query, fused, top_k=_FINAL_TOP_K)
 
 
 def query_knowledge_base(
@@ -26,25 +141,29 @@ def query_knowledge_base(
     if not query.strip():
         return "Please provide a valid question.", []
 
-    # 1. Vector Search
-    query_embedding = generate_query_embedding(query)
-    if query_embedding is None:
-        return "Could not generate an embedding for the query.", []
-    vector_results = search_similar_chunks(query_embedding, top_k=10)
-
-    # 2. BM25 Search
-    bm25_results = bm25_service.query(query, top_k=10)
-
-    # 3. Hybrid Search & Re-ranking
-    top_chunks = hybrid_search(
-        query_text=query,
-        bm25_results=bm25_results,
-        vector_results=vector_results,
-        top_k=5
-    )
+    # 1-3. Retrieval, served from the cache when the same question was
+    # asked against the same index version.
+    cache_key = (query.strip().lower(), bm25_service.version)
+    with _retrieval_cache_lock:
+        top_chunks = _retrieval_cache.get(cache_key)
+        if top_chunks is not None:
+            _retrieval_cache.move_to_end(cache_key)
+    if top_chunks is not None:
+        logger.info("Retrieval cache hit for query.")
+    else:
+        # Retrieve outside the lock; a concurrent duplicate retrieval is
+        # cheaper than serializing all queries behind it.
+        top_chunks = _retrieve_top_chunks(query, bm25_service)
+        if top_chunks is None:
+            return "Could not generate an embedding for the query.", []
+        with _retrieval_cache_lock:
+            _retrieval_cache[cache_key] = top_chunks
+            while len(_retrieval_cache) > _RETRIEVAL_CACHE_SIZE:
+                _retrieval_cache.popitem(last=False)
 
-    # 4. Confidence Check
-    if not top_chunks or (max(r.get("combined", 0.0) for r in top_chunks) < 0.12):
+    # 4. Confidence check: retrieval returns an empty list when nothing
+    # cleared the fused-score gate.
+    if not top_chunks:
         logger.info("Query returned no results above the confidence threshold.")
         return "I don't know. The provided documents do not contain the information.", []
 
@@ -0,0 +1,56 @@
+import threading
+from typing import List, Dict, Any, Optional
+
+import torch
+from sentence_transformers import CrossEncoder
+
+from backend.services.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+RERANKER_MODEL_NAME = "BAAI/bge-reranker-base"
+
+# Lazily loaded, shared across all queries; the lock keeps concurrent
+# first callers from loading the model twice.
+_reranker: Optional[CrossEncoder] = None
+_reranker_lock = threading.Lock()
+
+
+def get_reranker() -> CrossEncoder:
+    """Gets or initializes the shared cross-encoder reranker."""
+    global _reranker
+    if _reranker is None:
+        with _reranker_lock:
+            if _reranker is None:
+                logger.info(f"Loading reranker model: {RERANKER_MODEL_NAME}")
+                device = "cuda" if torch.cuda.is_available() else "cpu"
+                _reranker = CrossEncoder(RERANKER_MODEL_NAME, device=device,
+                                         max_length=512)
+    return _reranker
+
+
+def rerank_cross_encoder(query: str, chunks: List[Dict[str, Any]],
+                         top_k: int = 5) -> List[Dict[str, Any]]:
+    """
+    Re-orders candidate chunks by cross-encoder relevance to the query.
+
+    All (query, chunk) pairs go through one batched forward pass, so the
+    cost is a single model invocation regardless of candidate count. Each
+    surviving chunk gets a 'rerank_score'; on any failure the candidates
+    are returned unchanged (truncated to top_k) so retrieval still works
+    without the reranker.
+    """
+    if len(chunks) <= 1:
+        return chunks
+    try:
+        model = get_reranker()
+        pairs = [(query, c.get("text") or "") for c in chunks]
+        scores = model.predict(pairs, batch_size=len(pairs),
+                               show_progress_bar=False)
+        for chunk, score in zip(chunks, scores):
+            chunk["rerank_score"] = float(score)
+        reranked = sorted(chunks, key=lambda c: c["rerank_score"], reverse=True)
+        return reranked[:top_k]
+    except Exception as e:
+        logger.error(f"Reranking failed, keeping fused order: {e}", exc_info=True)
+        return chunks[:top_k]
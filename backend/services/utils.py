@@ -1,4 +1,5 @@
 import logging
+import re
 from typing import List, Dict, Any, Optional
 import os
 import math
@@ -25,6 +26,18 @@ except Exception:
 
 logger = logging.getLogger(__name__)
 
+# Compiled once; sentence_split runs per page in the chunking path
+_SENT_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Compiled once at import; preprocess_text runs per page, and inline re.sub
+# pays a pattern-cache lookup on every call.
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def preprocess_text(text: str) -> str:
+    """Basic text cleaning."""
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
 
 def count_tokens(text: str, model: str = 'gpt-3.5-turbo') -> int:
     """Approximate token count using tiktoken if available, else fallback to words."""
@@ -52,8 +65,7 @@ def sentence_split(text: str) -> List[str]:
         except Exception:
             pass
     # Simple fallback: split on punctuation
-    import re
-    parts = re.split(r'(?<=[.!?])\s+', text)
+    parts = _SENT_SPLIT_RE.split(text)
     return [p.strip() for p in parts if p and p.strip()]
 
 
@@ -2,8 +2,8 @@ import sys
 import os
 import logging
 
-# Add the project root to the Python path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Add the project root (this script's directory) to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from backend.services.qdrant_service import get_qdrant_client, QDRANT_COLLECTION
 from backend.services.bm25_service import BM25Service
@@ -13,37 +13,71 @@ from qdrant_client.http import models
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Large pages amortize the per-scroll round-trip overhead, which dominates
+# the fetch at small batch sizes.
+SCROLL_BATCH_SIZE = 1024
 
-def fetch_all_documents_from_qdrant():
+# Only the fields BM25 needs; skipping the rest of the payload cuts the
+# bytes on the wire substantially for metadata-heavy chunks.
+_BM25_PAYLOAD_FIELDS = ["document_name", "document_path", "chunk_index", "text"]
+
+
+def iter_documents_from_qdrant():
     """
-    Fetches all document chunks from the Qdrant collection.
+    Streams all document chunks from the Qdrant collection, one payload
+    dict at a time. Each scroll page is yielded and released before the
+    next one is consumed, so peak memory is one page of raw points plus
+    whatever the consumer keeps, instead of the whole collection twice.
+
+    A scroll failure propagates to the caller: ending the stream early
+    would hand the consumer a silently truncated corpus.
     """
     try:
+        from concurrent.futures import ThreadPoolExecutor
+
         client = get_qdrant_client()
         logger.info(f"Connecting to Qdrant collection: {QDRANT_COLLECTION}")
 
-        all_points = []
-        next_offset = 0
-        while True:
-            points, next_offset = client.scroll(
+        def scroll_page(offset):
+            return client.scroll(
                 collection_name=QDRANT_COLLECTION,
-                limit=256,
-                offset=next_offset,
-                with_payload=True,
+                limit=SCROLL_BATCH_SIZE,
+                offset=offset,
+                with_payload=models.PayloadSelectorInclude(include=_BM25_PAYLOAD_FIELDS),
                 with_vectors=False
             )
-            all_points.extend(points)
-            if next_offset is None:
-                break
-        
-        # Convert points to the format expected by BM25Service
-        docs = [p.payload for p in all_points if p.payload]
-        logger.info(f"Fetched a total of {len(docs)} documents from Qdrant.")
-        return docs
-        
+
+        # Scroll offsets are returned by the previous page, so pages cannot
+        # be fetched fully in parallel; instead the next page is prefetched
+        # on a worker thread while this thread yields the current one,
+        # overlapping the round-trip with the consumer's work.
+        total = 0
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            future = pool.submit(scroll_page, None)
+            while True:
+                points, next_offset = future.result()
+                if next_offset is not None:
+                    future = pool.submit(scroll_page, next_offset)
+                for p in points:
+                    if p.payload:
+                        total += 1
+                        yield p.payload
+                del points
+                if next_offset is None:
+                    break
+        logger.info(f"Fetched a total of {total} documents from Qdrant.")
+
     except Exception as e:
         logger.error(f"Failed to fetch documents from Qdrant: {e}", exc_info=True)
-        return []
+        raise
+
+
+def fetch_all_documents_from_qdrant():
+    """
+    Fetches all document chunks from the Qdrant collection as a list.
+    Prefer iter_documents_from_qdrant() when streaming is possible.
+    """
+    return list(iter_documents_from_qdrant())
 
 
 def main():
@@ -51,20 +85,25 @@ def main():
     Main function to rebuild the BM25 index.
     """
     logger.info("Starting BM25 index rebuild process...")
-    
-    # 1. Fetch all documents from Qdrant
-    documents = fetch_all_documents_from_qdrant()
-    
-    if not documents:
-        logger.warning("No documents found in Qdrant. Aborting BM25 index rebuild.")
-        return
 
-    # 2. Initialize BM25Service
+    # 1. Initialize BM25Service
     # Ensure the index path matches the one used in your application
-    bm25_service = BM25Service(index_path="bm25_index.pkl")
+    bm25_service = BM25Service(index_path="bm25_index")
 
-    # 3. Build and save the new index
-    bm25_service.build_index(documents)
+    # 2. Stream documents out of Qdrant straight into the index build; raw
+    # scroll pages are dropped as soon as their payloads are consumed.
+    # build_index materializes the stream before touching any index state,
+    # so a mid-scroll failure aborts here with nothing saved rather than
+    # persisting an index built from a partial corpus.
+    try:
+        bm25_service.build_index(iter_documents_from_qdrant())
+    except Exception:
+        logger.error("Aborting BM25 rebuild; the existing index is unchanged.")
+        return
+
+    if not bm25_service.is_built:
+        logger.warning("No documents found in Qdrant. BM25 index was not rebuilt.")
+        return
 
     logger.info("BM25 index has been successfully rebuilt and saved.")
 
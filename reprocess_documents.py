@@ -17,8 +17,12 @@ logger = logging.getLogger(__name__)
 DOCUMENT_DIR = r"D:\knowledge base\Document for test"
 QDRANT_COLLECTION = "knowledge_base"
 
+SUPPORTED_EXTS = frozenset(
+    ['.pdf', '.docx', '.doc', '.txt', '.xlsx', '.xls', '.csv', '.md', '.json']
+)
 
-def reprocess_all_documents():
+
+def reprocess_all_documents(batch_size: int = 256):
     """Reprocess all documents with new chunk size"""
     try:
         logger.info("Starting document reprocessing...")
@@ -46,10 +50,15 @@ def reprocess_all_documents():
             logger.error(f"Document directory not found: {DOCUMENT_DIR}")
             return False
         
-        files = [f for f in os.listdir(DOCUMENT_DIR) if os.path.isfile(os.path.join(DOCUMENT_DIR, f))]
-        supported_ext = ['.pdf', '.docx', '.doc', '.txt', '.xlsx', '.xls', '.csv', '.md', '.json']
-        
-        doc_files = [f for f in files if any(f.lower().endswith(ext) for ext in supported_ext)]
+        # scandir's DirEntry answers is_file from the directory read itself,
+        # skipping the per-name stat that listdir + isfile pays; the
+        # extension check is one frozenset probe instead of a loop.
+        with os.scandir(DOCUMENT_DIR) as entries:
+            doc_files = [
+                e.name for e in entries
+                if e.is_file(follow_symlinks=False)
+                and os.path.splitext(e.name)[1].lower() in SUPPORTED_EXTS
+            ]
         
         if not doc_files:
             logger.warning("No documents found to process")
@@ -59,22 +68,33 @@ def reprocess_all_documents():
         
         success_count = 0
         failed_count = 0
-        
-        for i, filename in enumerate(doc_files, 1):
-            file_path = os.path.join(DOCUMENT_DIR, filename)
-            logger.info(f"[{i}/{len(doc_files)}] Processing: {filename}")
-            
-            try:
-                result = process_document(file_path)
-                if result:
-                    success_count += 1
-                    logger.info(f"  ✓ Success")
-                else:
+
+        # Files are independent, so parse/embed/upload them on a thread
+        # pool (the same sizing the file watcher uses). Threads rather than
+        # processes: workers share the one loaded embedding model and the
+        # pooled Qdrant client, and parsing/encoding release the GIL in
+        # their C extensions.
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as pool:
+            futures = {
+                pool.submit(process_document, os.path.join(DOCUMENT_DIR, f),
+                            batch_size=batch_size): f
+                for f in doc_files
+            }
+            for i, future in enumerate(as_completed(futures), 1):
+                filename = futures[future]
+                try:
+                    result = future.result()
+                    if result:
+                        success_count += 1
+                        logger.info(f"[{i}/{len(doc_files)}] ✓ {filename}")
+                    else:
+                        failed_count += 1
+                        logger.warning(f"[{i}/{len(doc_files)}] ✗ {filename}")
+                except Exception as e:
                     failed_count += 1
-                    logger.warning(f"  ✗ Failed")
-            except Exception as e:
-                failed_count += 1
-                logger.error(f"  ✗ Error: {str(e)}")
+                    logger.error(f"[{i}/{len(doc_files)}] ✗ {filename}: {str(e)}")
         
         logger.info("\n" + "="*80)
         logger.info(f"REPROCESSING COMPLETE")
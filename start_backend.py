@@ -7,4 +7,11 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 if __name__ == "__main__":
     print("Starting Knowledge Base RAG System Backend...")
-    uvicorn.run("backend.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    # Auto-reload only in development; it forks a watcher parent and caps
+    # the server at a single worker. Production worker count comes from
+    # WEB_CONCURRENCY (default 1: the app embeds the file watcher and the
+    # BM25 index writer, which must run in exactly one process).
+    dev_mode = os.environ.get("ENV") == "dev"
+    uvicorn.run("backend.main:app", host="0.0.0.0", port=8000,
+                reload=dev_mode, loop="auto", http="httptools",
+                workers=1 if dev_mode else int(os.environ.get("WEB_CONCURRENCY", "1")))
\ No newline at end of file
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Put the project root on sys.path once for the whole session, so the
+# individual test modules do not each need their own path bookkeeping.
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)